@@ -21,16 +21,44 @@ ConsensusWeaverAgent CI/CD脚本
 """
 
 import argparse
+import asyncio
+import atexit
+import concurrent.futures
+import configparser
+import dataclasses
+import fnmatch
+import functools
+import graphlib
+import hashlib
+import json
 import logging
 import os
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 import tomllib
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from collections import deque
+from logging.handlers import MemoryHandler
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 DEFAULT_CONFIG = {
     "PYTHON_VERSION": "3.12",
@@ -50,56 +78,208 @@ DEFAULT_CONFIG = {
     "COVERAGE_THRESHOLD": "75",
 }
 
+# 子进程输出保留的尾部行数，以及单行读取的缓冲上限
+OUTPUT_TAIL_LINES = 4096
+OUTPUT_LINE_LIMIT = 1024 * 1024
+# 按块转发输出时保留的尾部字节数
+OUTPUT_TAIL_BYTES = 1024 * 1024
+# 日志文件缓冲的记录条数
+LOG_BUFFER_CAPACITY = 1024
+# 各阶段用到的命令行工具，随项目依赖一次性安装，避免各阶段单独调用uv安装；
+# twine只在发布时使用，未安装时通过uvx在隔离环境中运行，不写入项目环境
+TOOL_DEPS = ["bandit", "build"]
+# uv缓存目录（相对项目目录）
+UV_CACHE_DIR = ".uv-cache"
+# 阶段戳文件的默认目录（相对项目目录），可通过 --cache-dir 修改
+STAMP_DIR = ".ci-cache"
+# 常驻工具进程脚本、传递连接认证密钥的环境变量以及等待其开始监听的最长时间（秒）
+WORKER_SCRIPT = Path(__file__).with_name("cicd_worker.py")
+WORKER_AUTHKEY_ENV = "CICD_WORKER_AUTHKEY"
+WORKER_CONNECT_TIMEOUT = 30
+
+
+# 终端颜色代码
+GREEN = "\033[92m"
+RED = "\033[91m"
+YELLOW = "\033[93m"
+BLUE = "\033[94m"
+PURPLE = "\033[95m"
+CYAN = "\033[96m"
+RESET = "\033[0m"
+
+# 颜色支持在导入时解析一次；不支持颜色时所有颜色映射为空串，get_color只需一次字典查找
+_IS_TTY = hasattr(sys.stdout, "isatty") and sys.stdout.isatty()
+_COLORS = {
+    name: code if _IS_TTY else ""
+    for name, code in (
+        ("green", GREEN),
+        ("red", RED),
+        ("yellow", YELLOW),
+        ("blue", BLUE),
+        ("purple", PURPLE),
+        ("cyan", CYAN),
+        ("reset", RESET),
+    )
+}
+_RESET = _COLORS["reset"]
+# 预先拼好的消息结尾和节标题分隔线
+_LINE_END = _RESET + "\n"
+_SECTION_RULE = "=" * 60
 
-class Colors:
-    """终端颜色定义，支持跨平台"""
-
-    GREEN = "\033[92m"
-    RED = "\033[91m"
-    YELLOW = "\033[93m"
-    BLUE = "\033[94m"
-    PURPLE = "\033[95m"
-    CYAN = "\033[96m"
-    RESET = "\033[0m"
-
-    @staticmethod
-    def supported() -> bool:
-        """检查终端是否支持颜色"""
-        return hasattr(sys.stdout, "isatty") and sys.stdout.isatty()
+# 并发执行的阶段共享标准输出，每条消息在锁内一次写出，避免行内交错
+_OUTPUT_LOCK = threading.Lock()
 
 
 def get_color(color: str) -> str:
-    """获取颜色代码"""
-    if not Colors.supported():
-        return ""
-    return getattr(Colors, color.upper(), Colors.RESET)
+    """获取颜色代码（颜色名使用小写）"""
+    return _COLORS.get(color, _RESET)
 
 
 def print_color(message: str, color: str = "reset") -> None:
     """打印带颜色的消息"""
-    print(f"{get_color(color)}{message}{get_color('reset')}")
+    prefix = _COLORS.get(color, _RESET)
+    with _OUTPUT_LOCK:
+        sys.stdout.write(prefix + message + _LINE_END)
 
 
 def print_section(title: str) -> None:
-    """打印节标题"""
-    print_color(f"\n{'=' * 60}", "blue")
-    print_color(f"{title:^60}", "blue")
-    print_color(f"{'=' * 60}", "blue")
+    """打印节标题
+
+    整个标题块合并为一次写入；节标题标志着阶段边界，因此在此处刷新输出。
+    """
+    rule = _SECTION_RULE
+    with _OUTPUT_LOCK:
+        sys.stdout.write(f"\n{_COLORS['blue']}{rule}\n{title:^60}\n{rule}{_LINE_END}")
+        sys.stdout.flush()
 
 
 def print_subsection(title: str) -> None:
     """打印子节标题"""
-    print_color(f"\n{title}", "cyan")
-    print_color("-" * len(title), "cyan")
+    underline = "-" * len(title)
+    with _OUTPUT_LOCK:
+        sys.stdout.write(f"\n{_COLORS['cyan']}{title}\n{underline}{_LINE_END}")
+
+
+@functools.lru_cache(maxsize=None)
+def _probe(cmd: Tuple[str, ...]) -> "subprocess.CompletedProcess[str]":
+    """运行探测命令（如 ``tool --version``），结果在整个CI/CD运行期间缓存
+
+    命令不存在时返回退出码127的结果而不是抛出异常。
+    """
+    argv = list(cmd)
+    # 解析为绝对路径并保持close_fds=False，使子进程可以走posix_spawn快速路径
+    argv[0] = shutil.which(argv[0]) or argv[0]
+    try:
+        return subprocess.run(argv, capture_output=True, text=True, close_fds=False)
+    except OSError as e:
+        return subprocess.CompletedProcess(list(cmd), 127, "", str(e))
+
+
+@functools.lru_cache(maxsize=None)
+def _path_index() -> Dict[str, str]:
+    """扫描PATH中的目录，建立命令名到可执行文件路径的索引
+
+    每个目录只通过os.scandir扫描一次，之后的命令查找都是字典查找；
+    同名命令以PATH中靠前的目录为准。Windows下按PATHEXT去掉扩展名，
+    命令名统一转为小写。安装新工具后需调用cache_clear重建索引。
+    """
+    index: Dict[str, str] = {}
+    path_exts: Set[str] = set()
+    if os.name == "nt":
+        path_exts = {
+            ext.lower()
+            for ext in os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").split(os.pathsep)
+            if ext
+        }
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if not directory:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if os.name == "nt":
+                        stem, ext = os.path.splitext(name)
+                        if ext.lower() not in path_exts:
+                            continue
+                        name = stem.lower()
+                    index.setdefault(name, entry.path)
+        except OSError:
+            continue
+    return index
+
+
+def _scan_inputs(root: Path, patterns: Tuple[str, ...]) -> List[Tuple[str, int, int]]:
+    """列出项目中匹配模式的输入文件
+
+    模式形如 ``src/**/*.py``（递归匹配目录下的文件）或 ``pyproject.toml``、
+    ``*.py``（匹配项目根目录下的文件）。递归时跳过以 ``.`` 开头的目录和
+    ``__pycache__``。只通过os.scandir遍历目录，文件信息取自目录项，
+    不读取文件内容。
+
+    Returns:
+        按相对路径排序的(相对路径, 修改时间ns, 文件大小)列表
+    """
+    found: Dict[str, Tuple[str, int, int]] = {}
+
+    def scan(directory: str, prefix: str, name_pattern: str, recursive: bool) -> None:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not entry.name.startswith(
+                            (".", "__pycache__")
+                        ):
+                            scan(
+                                entry.path,
+                                f"{prefix}{entry.name}/",
+                                name_pattern,
+                                recursive,
+                            )
+                    elif fnmatch.fnmatch(entry.name, name_pattern) and entry.is_file():
+                        st = entry.stat()
+                        rel = prefix + entry.name
+                        found[rel] = (rel, st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+
+    for pattern in patterns:
+        top, sep, name_pattern = pattern.partition("/**/")
+        if sep:
+            scan(os.path.join(root, top), f"{top}/", name_pattern, True)
+        else:
+            scan(str(root), "", pattern, False)
+    return [found[rel] for rel in sorted(found)]
+
+
+class FastTimeFormatter(logging.Formatter):
+    """日志时间格式化器
+
+    普通记录直接输出记录创建时的Unix时间戳（毫秒精度），避免每条记录都调用
+    time.localtime和time.strftime；ERROR及以上级别仍输出便于阅读的本地时间。
+    """
+
+    def formatTime(
+        self, record: logging.LogRecord, datefmt: Optional[str] = None
+    ) -> str:
+        if record.levelno >= logging.ERROR:
+            return super().formatTime(record, datefmt)
+        return f"{record.created:.3f}"
 
 
-@dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class CICDConfig:
-    """统一的CI/CD配置类"""
+    """统一的CI/CD配置类
+
+    配置在创建后不可修改，可在并发执行的阶段之间安全共享；
+    需要调整时通过dataclasses.replace生成新的配置。
+    """
 
     python_version: str
     uv_version: str
-    project_dir: str
+    project_dir: Path
+    src_dir: Path
+    log_path: Path
     test_results_file: str
     security_report_file: str
     uv_index_url: str
@@ -134,6 +314,11 @@ class CICDConfig:
     skip_nltk: bool
     pytest_k: Optional[str]
     skip_coverage: bool
+    use_worker: bool
+    serial: bool
+    use_cache: bool
+    cache_dir: Path
+    assume_answer: Optional[bool]
 
 
 class CICDError(Exception):
@@ -142,12 +327,167 @@ class CICDError(Exception):
     pass
 
 
+T = TypeVar("T")
+
+StageFunc = Callable[[], bool]
+# (阶段名称, 阶段函数, 是否为必需阶段)
+Stage = Tuple[str, StageFunc, bool]
+# (阶段名称, 阶段方法名, 是否为必需阶段, 所属流程标签)
+StageSpec = Tuple[str, str, bool, FrozenSet[str]]
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _StageResult:
+    """单个阶段的执行结果
+
+    status取值：passed（成功）、failed（失败）、cached（输入未变化，跳过）、
+    skipped（必需阶段失败，未执行）。
+    """
+
+    name: str
+    key: str
+    status: str
+    duration: float
+
+
+# 各状态在总结表中的图标和颜色
+_STATUS_STYLES: Dict[str, Tuple[str, str]] = {
+    "passed": ("✅", "green"),
+    "failed": ("❌", "red"),
+    "cached": ("⏭️", "blue"),
+    "skipped": ("⏸️", "yellow"),
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config_file(path: str, mtime_ns: int) -> Dict[str, str]:
+    """解析INI配置文件的[cicd]节
+
+    以(路径, 修改时间)为缓存键，文件被修改后自动失效。键名统一转换为大写，
+    与DEFAULT_CONFIG保持一致。调用方不得修改返回的字典。
+    """
+    parser = configparser.ConfigParser()
+    parser.read(path, encoding="utf-8")
+    if not parser.has_section("cicd"):
+        return {}
+    return {key.upper(): value for key, value in parser.items("cicd")}
+
+
+def load_config(config_file: Optional[str]) -> Dict[str, str]:
+    """加载配置，配置文件中的值覆盖DEFAULT_CONFIG
+
+    Args:
+        config_file: 配置文件路径，为None时仅使用默认配置
+
+    Returns:
+        合并后的配置字典
+    """
+    settings = dict(DEFAULT_CONFIG)
+    if config_file:
+        if not os.path.exists(config_file):
+            raise CICDError(f"配置文件不存在: {config_file}")
+        mtime_ns = os.stat(config_file).st_mtime_ns
+        settings.update(_parse_config_file(config_file, mtime_ns))
+    return settings
+
+
 class CICD:
     """统一的CI/CD脚本主类"""
 
+    # 阶段依赖关系：键为阶段方法名，值为必须先完成的阶段方法名
+    # 不在当前流程中的依赖视为已满足，互不依赖的阶段会并发执行
+    STAGE_DEPENDENCIES: Dict[str, Set[str]] = {
+        "install_dependencies": {"setup_environment"},
+        "lint_and_format": {"install_dependencies"},
+        "type_check": {"install_dependencies", "lint_and_format"},
+        "run_tests": {"install_dependencies", "lint_and_format", "check_environment"},
+        "run_security_check": {"install_dependencies", "lint_and_format"},
+        "check_environment": {"install_dependencies"},
+        "run_checks": {"check_environment", "lint_and_format"},
+        "build_package": {"run_checks", "run_tests", "type_check"},
+        "publish_package": {"build_package"},
+        "manage_git_tags": {"publish_package"},
+    }
+
+    # 完整的阶段表，三种执行模式按标签筛选：
+    # "ci"、"cd"分别表示CI和CD流程包含该阶段，"all"表示完整CI/CD流程包含该阶段；
+    # 代码检查（ruff检查+mypy）与CI中的代码规范检查和类型检查重复，因此不属于完整流程
+    STAGES: Tuple[StageSpec, ...] = (
+        ("环境准备", "setup_environment", True, frozenset({"ci", "all"})),
+        ("依赖安装", "install_dependencies", True, frozenset({"ci", "all"})),
+        ("环境检查", "check_environment", True, frozenset({"cd", "all"})),
+        ("代码格式化与规范检查", "lint_and_format", False, frozenset({"ci", "all"})),
+        ("类型检查", "type_check", False, frozenset({"ci", "all"})),
+        ("代码检查", "run_checks", False, frozenset({"cd"})),
+        ("测试执行", "run_tests", False, frozenset({"ci", "cd", "all"})),
+        ("安全检查", "run_security_check", False, frozenset({"ci", "all"})),
+        ("包构建", "build_package", False, frozenset({"cd", "all"})),
+        ("包发布", "publish_package", False, frozenset({"cd", "all"})),
+        ("Git标签管理", "manage_git_tags", False, frozenset({"cd", "all"})),
+    )
+
+    # 只读取源码、成功即可复用结果的阶段及其输入文件：输入未变化时跳过重跑。
+    # 各阶段的结果都取决于已安装的依赖，因此都包含pyproject.toml和uv.lock；
+    # 虚拟环境中已安装的包另由_cache_key计入
+    STAGE_INPUTS: Dict[str, Tuple[str, ...]] = {
+        "lint_and_format": (
+            "src/**/*.py",
+            "tests/**/*.py",
+            "Scripts/**/*.py",
+            "*.py",
+            "pyproject.toml",
+            "uv.lock",
+        ),
+        "type_check": ("src/**/*.py", "pyproject.toml", "uv.lock"),
+        "run_tests": ("src/**/*", "tests/**/*", "pyproject.toml", "uv.lock"),
+        "run_security_check": ("src/**/*.py", "pyproject.toml", "uv.lock"),
+        "run_checks": (
+            "src/**/*.py",
+            "tests/**/*.py",
+            "Scripts/**/*.py",
+            "*.py",
+            "pyproject.toml",
+            "uv.lock",
+        ),
+    }
+
+    # 可缓存阶段读取的配置字段：只有这些字段变化时才使阶段缓存失效，
+    # 与本阶段结果无关的选项（如跳过其他阶段、发布设置）不影响缓存
+    STAGE_CONFIG_FIELDS: Dict[str, Tuple[str, ...]] = {
+        "lint_and_format": ("skip_format", "ruff_output_format", "auto_fix"),
+        "type_check": ("skip_mypy", "mypy_strict", "src_dir"),
+        "run_tests": (
+            "skip_tests",
+            "skip_nltk",
+            "test_results_file",
+            "pytest_verbose",
+            "pytest_tb_style",
+            "pytest_k",
+            "coverage_enabled",
+            "skip_coverage",
+            "coverage_threshold",
+        ),
+        "run_security_check": ("skip_security",),
+        "run_checks": ("skip_checks", "mypy_strict"),
+    }
+
+    # pyproject.toml中位于行首的版本号字面量，不会匹配target-version等键
+    _VERSION_RE = re.compile(rb'^version = "(?P<v>[^"]+)"', re.MULTILINE)
+
     def __init__(self, config: CICDConfig):
         self.config = config
         self.logger = self._setup_logger()
+        # 命令名 -> 可执行文件路径（None表示未找到）
+        self._which_cache: Dict[str, Optional[str]] = {}
+        self._worker: Optional["subprocess.Popen[bytes]"] = None
+        self._worker_conn: Optional[Connection] = None
+        self._worker_dir: Optional[str] = None
+        self._worker_failed = False
+        self._worker_lock = threading.Lock()
+        # 每个阶段线程持有自己的事件循环（见_run_stage和_run_async）
+        self._local = threading.local()
+        # 本次流程中各阶段的执行结果，由_finalize汇总输出
+        self._results: List[_StageResult] = []
         self._setup_environment()
         self.current_version = self._get_current_version()
 
@@ -160,34 +500,83 @@ class CICD:
         console_handler.setLevel(logging.INFO)
         console_formatter = logging.Formatter("%(message)s")
         console_handler.setFormatter(console_formatter)
+        # 结构化记录（JSON）只写入日志文件，终端显示总结表
+        console_handler.addFilter(
+            lambda record: not getattr(record, "structured", False)
+        )
         logger.addHandler(console_handler)
 
-        log_dir = os.path.join(self.config.project_dir, "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, "cicd.log")
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        self.config.log_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(self.config.log_path, encoding="utf-8")
         file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter(
+        file_formatter = FastTimeFormatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+
+        # 批量写入日志文件：缓冲满或出现ERROR级别记录时才落盘
+        buffered_handler = MemoryHandler(
+            capacity=LOG_BUFFER_CAPACITY,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True,
+        )
+        buffered_handler.setLevel(logging.DEBUG)
+        logger.addHandler(buffered_handler)
+        atexit.register(buffered_handler.flush)
 
         return logger
 
     def _setup_environment(self) -> None:
-        """设置环境变量"""
-        os.environ["UV_INDEX_URL"] = self.config.uv_index_url
+        """设置环境变量
 
-    def _run_command(
-        self, cmd: List[str], cwd: Optional[str] = None, quiet: bool = False
+        uv缓存固定在项目目录下，重复运行时直接复用已下载的wheel，并以硬链接方式
+        安装（Windows下使用复制）；安装时预编译字节码，测试导入时无需再编译。
+        已在环境中设置的值优先。
+        """
+        os.environ["UV_INDEX_URL"] = self.config.uv_index_url
+        os.environ.setdefault(
+            "UV_CACHE_DIR", str(self.config.project_dir / UV_CACHE_DIR)
+        )
+        os.environ.setdefault("UV_LINK_MODE", "copy" if os.name == "nt" else "hardlink")
+        os.environ.setdefault("UV_COMPILE_BYTECODE", "1")
+
+    def _spawn_args(
+        self, cmd: List[str], cwd: Optional[Path]
+    ) -> Tuple[List[str], Optional[Path]]:
+        """调整子进程参数，使CPython可以通过posix_spawn启动子进程
+
+        posix_spawn（glibc下基于vfork，不复制页表）仅在可执行文件为带目录的路径、
+        未指定cwd且close_fds=False等条件下启用，否则回退到fork+exec：
+        - 命令名通过PATH索引解析为绝对路径
+        - 工作目录与当前目录相同时不再传入cwd（main中已切换到项目目录）
+        """
+        executable = cmd[0]
+        if not os.path.dirname(executable):
+            executable = self._which(executable) or executable
+        if cwd is not None and os.fspath(cwd) == os.getcwd():
+            cwd = None
+        return [executable, *cmd[1:]], cwd
+
+    async def _run_command_async(
+        self,
+        cmd: List[str],
+        cwd: Optional[Path] = None,
+        quiet: bool = False,
+        env: Optional[Dict[str, str]] = None,
     ) -> Tuple[bool, str]:
-        """运行命令并返回结果
+        """异步运行命令并返回结果
+
+        非静默模式下子进程直接继承当前进程的标准输出和标准错误，
+        保留工具自身的彩色和进度输出，此时不捕获输出，返回的输出内容为空串。
+        仅当日志级别为DEBUG时，才通过管道把输出原样转发到终端，
+        同时将有界的尾部写入日志（子进程此时不再连接终端，可能不输出颜色）。
 
         Args:
             cmd: 命令列表
             cwd: 工作目录
-            quiet: 是否静默运行
+            quiet: 是否静默运行（静默时捕获输出）
+            env: 子进程环境变量，为None时继承当前进程环境
 
         Returns:
             (成功标志, 输出内容)
@@ -195,32 +584,42 @@ class CICD:
         self.logger.debug(f"执行命令: {' '.join(cmd)}")
         if not quiet:
             print_color(f"执行: {' '.join(cmd)}", "purple")
+            sys.stdout.flush()
 
+        # Python创建的文件描述符默认不可继承，close_fds=False不会泄漏句柄
+        argv, cwd = self._spawn_args(cmd, cwd)
         try:
-            result = subprocess.run(
-                cmd,
+            if not quiet:
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    return await self._tee_command(argv, cwd, env)
+                proc = await asyncio.create_subprocess_exec(
+                    *argv, cwd=cwd, env=env, close_fds=False
+                )
+                await proc.wait()
+                return proc.returncode == 0, ""
+
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
                 cwd=cwd,
-                capture_output=True,
-                encoding="utf-8",
-                errors="ignore",
-                check=False,
+                env=env,
+                close_fds=False,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=OUTPUT_LINE_LIMIT,
             )
-            stdout = result.stdout if result.stdout is not None else ""
-            stderr = result.stderr if result.stderr is not None else ""
-            output = stdout + stderr
-            self.logger.debug(f"命令输出: {output}")
+            assert proc.stdout is not None
 
-            if not quiet:
-                if output:
-                    print(output)
+            # 仅保留有界的尾部用于返回值和日志
+            tail: Deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+            while line_bytes := await proc.stdout.readline():
+                tail.append(line_bytes.decode("utf-8", errors="ignore"))
+            await proc.wait()
 
-            return result.returncode == 0, output
-        except UnicodeDecodeError as e:
-            error_msg = f"命令执行失败（编码错误）: {e}"
-            self.logger.error(error_msg)
-            if not quiet:
-                print_color(error_msg, "red")
-            return False, str(e)
+            output = "".join(tail)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"命令输出: {output}")
+
+            return proc.returncode == 0, output
         except Exception as e:
             error_msg = f"命令执行失败: {e}"
             self.logger.error(error_msg)
@@ -228,32 +627,294 @@ class CICD:
                 print_color(error_msg, "red")
             return False, str(e)
 
-    def _command_exists(self, command: str) -> bool:
-        """检查命令是否存在"""
-        return (
-            subprocess.run(
-                [command, "--version"] if command != "python" else [command, "-V"],
-                capture_output=True,
-                text=True,
-            ).returncode
-            == 0
+    async def _tee_command(
+        self, argv: List[str], cwd: Optional[Path], env: Optional[Dict[str, str]]
+    ) -> Tuple[bool, str]:
+        """运行命令，将输出按块原样转发到终端，并把有界尾部写入调试日志
+
+        按块转发字节而不是按行解码，pytest等工具的进度输出不会因等待换行而延迟。
+        尾部按字节数（OUTPUT_TAIL_BYTES）截断，只在启用调试日志时收集。
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            cwd=cwd,
+            env=env,
+            close_fds=False,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        assert proc.stdout is not None
+
+        out = sys.stdout.buffer
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        tail = bytearray()
+        truncated = False
+        while chunk := await proc.stdout.read(65536):
+            with _OUTPUT_LOCK:
+                out.write(chunk)
+                out.flush()
+            if debug:
+                tail += chunk
+                if len(tail) > OUTPUT_TAIL_BYTES:
+                    # bytearray从头部删除只移动起始偏移，不复制剩余数据
+                    del tail[: len(tail) - OUTPUT_TAIL_BYTES]
+                    truncated = True
+        await proc.wait()
+
+        if debug:
+            lines = tail.decode("utf-8", errors="ignore").splitlines(True)
+            if truncated:
+                # 截断处的第一行不完整
+                lines = lines[1:]
+            self.logger.debug(f"命令输出: {''.join(lines[-OUTPUT_TAIL_LINES:])}")
+        return proc.returncode == 0, ""
+
+    def _run_command(
+        self,
+        cmd: List[str],
+        cwd: Optional[Path] = None,
+        quiet: bool = False,
+        env: Optional[Dict[str, str]] = None,
+    ) -> Tuple[bool, str]:
+        """运行命令并返回结果（同步封装）
+
+        Args:
+            cmd: 命令列表
+            cwd: 工作目录
+            quiet: 是否静默运行
+            env: 子进程环境变量，为None时继承当前进程环境
+
+        Returns:
+            (成功标志, 输出内容)
+        """
+        return self._run_async(
+            self._run_command_async(cmd, cwd=cwd, quiet=quiet, env=env)
         )
 
+    def _run_async(self, coro: Coroutine[Any, Any, T]) -> T:
+        """在当前阶段的事件循环中运行协程
+
+        阶段内的所有命令复用_run_stage创建的同一个事件循环，
+        不必为每条命令都新建和关闭事件循环；不在阶段中调用时退回asyncio.run。
+        """
+        runner: Optional[asyncio.Runner] = getattr(self._local, "runner", None)
+        if runner is None:
+            return asyncio.run(coro)
+        return runner.run(coro)
+
+    async def _run_many(
+        self, cmds: List[List[str]], cwd: Optional[Path] = None
+    ) -> List[Tuple[bool, str]]:
+        """并发运行多个互不依赖的命令
+
+        各命令以静默模式运行（捕获输出），每个命令结束后立即整块输出其结果，
+        既不必等待最慢的命令，也避免并发输出相互交错。
+
+        Args:
+            cmds: 命令列表
+            cwd: 工作目录
+
+        Returns:
+            与cmds顺序一致的(成功标志, 输出内容)列表
+        """
+
+        async def run_one(cmd: List[str]) -> Tuple[bool, str]:
+            result = await self._run_command_async(cmd, cwd=cwd, quiet=True)
+            with _OUTPUT_LOCK:
+                sys.stdout.write(
+                    f"{_COLORS['purple']}执行: {' '.join(cmd)}{_LINE_END}{result[1]}"
+                )
+                sys.stdout.flush()
+            return result
+
+        if self.config.serial:
+            return [await run_one(cmd) for cmd in cmds]
+        return list(await asyncio.gather(*(run_one(cmd) for cmd in cmds)))
+
+    def _start_worker(self) -> None:
+        """启动常驻工具进程并建立连接
+
+        工具进程在临时目录中的Unix套接字（Windows下为命名管道）上监听，
+        本进程以随机密钥认证后连接。工具进程启动后会预先导入mypy和pytest，
+        导入与本进程的其他工作重叠进行。调用方需持有_worker_lock。
+        """
+        if os.name == "nt":
+            address = rf"\\.\pipe\cicd-worker-{os.getpid()}-{os.urandom(4).hex()}"
+        else:
+            self._worker_dir = tempfile.mkdtemp(prefix="cicd-worker-")
+            address = os.path.join(self._worker_dir, "worker.sock")
+        authkey = os.urandom(16)
+
+        self._worker = subprocess.Popen(
+            [*self._tool_command("python"), str(WORKER_SCRIPT), address],
+            cwd=self.config.project_dir,
+            stdin=subprocess.DEVNULL,
+            env={**os.environ, WORKER_AUTHKEY_ENV: authkey.hex()},
+        )
+        deadline = time.monotonic() + WORKER_CONNECT_TIMEOUT
+        while True:
+            try:
+                self._worker_conn = Client(address, authkey=authkey)
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self._worker.poll() is not None or time.monotonic() > deadline:
+                    raise OSError("常驻工具进程未能开始监听")
+                time.sleep(0.05)
+
+    def _worker_call(
+        self, tool: str, args: List[str], env: Dict[str, str]
+    ) -> Optional[int]:
+        """通过常驻工具进程执行一次请求
+
+        首次调用时启动进程；进程不可用时记录警告并返回None，由调用方回退。
+        调用方需持有_worker_lock。
+        """
+        if self._worker_failed:
+            return None
+        request = {
+            "tool": tool,
+            "args": args,
+            "cwd": str(self.config.project_dir),
+            "env": env,
+        }
+        try:
+            if self._worker_conn is None:
+                self._start_worker()
+            assert self._worker_conn is not None
+            self._worker_conn.send(request)
+            return int(self._worker_conn.recv()["returncode"])
+        except (OSError, EOFError, AuthenticationError, KeyError, TypeError) as e:
+            self.logger.warning(f"常驻工具进程不可用，回退为独立子进程: {e}")
+            self._worker_failed = True
+            self._stop_worker()
+            return None
+
+    def _stop_worker(self) -> None:
+        """关闭常驻工具进程
+
+        关闭连接后工具进程读到连接结束即退出。
+        """
+        conn, self._worker_conn = self._worker_conn, None
+        worker, self._worker = self._worker, None
+        worker_dir, self._worker_dir = self._worker_dir, None
+        if conn is not None:
+            conn.close()
+        if worker is not None:
+            try:
+                worker.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+        if worker_dir is not None:
+            shutil.rmtree(worker_dir, ignore_errors=True)
+
+    def _run_tool(
+        self, tool: str, args: List[str], env: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """运行Python工具（mypy、pytest或Python脚本）
+
+        启用 --worker 时在常驻工具进程中执行，所有工具共享一次解释器启动；
+        未启用或进程不可用时回退为独立子进程（见_tool_command）。
+
+        Args:
+            tool: 工具名称，"python"表示运行脚本（args[0]为脚本路径）
+            args: 工具参数
+            env: 需要覆盖的环境变量
+
+        Returns:
+            是否成功
+        """
+        env = env or {}
+        if self.config.use_worker:
+            print_color(f"执行(常驻进程): {tool} {' '.join(args)}", "purple")
+            with self._worker_lock:
+                returncode = self._worker_call(tool, args, env)
+            if returncode is not None:
+                return returncode == 0
+
+        cmd = [*self._tool_command(tool), *args]
+        full_env = {**os.environ, **env} if env else None
+        success, _ = self._run_command(cmd, cwd=self.config.project_dir, env=full_env)
+        return success
+
+    def _which(self, command: str) -> Optional[str]:
+        """在PATH索引中查找命令对应的可执行文件路径
+
+        索引中不存在即视为未安装；命中但不可执行（如同名的普通文件）时，
+        回退到shutil.which按PATH顺序继续查找。结果按命令名缓存在_which_cache中，
+        同一命令的后续查找不再访问文件系统。
+        """
+        if command in self._which_cache:
+            return self._which_cache[command]
+
+        key = command.lower() if os.name == "nt" else command
+        path = _path_index().get(key)
+        if path is not None and not (os.path.isfile(path) and os.access(path, os.X_OK)):
+            path = shutil.which(command)
+        self._which_cache[command] = path
+        return path
+
+    def _prefetch_versions(self, *tools: str) -> None:
+        """并发探测多个已安装工具的版本
+
+        各 ``--version`` 子进程同时运行，结果写入_probe缓存，之后逐个读取版本时
+        直接命中缓存，总耗时取决于最慢的探测而非所有探测之和。
+        """
+
+        async def probe_all() -> None:
+            await asyncio.gather(
+                *(
+                    asyncio.to_thread(_probe, (tool, "--version"))
+                    for tool in tools
+                    if self._command_exists(tool)
+                )
+            )
+
+        self._run_async(probe_all())
+
+    def _refresh_tool_lookups(self) -> None:
+        """安装新工具后清除命令查找和版本探测的缓存"""
+        _probe.cache_clear()
+        _path_index.cache_clear()
+        self._which_cache.clear()
+
+    def _command_exists(self, command: str) -> bool:
+        """检查命令是否存在
+
+        通过预先建立的PATH索引查找，不启动子进程；
+        需要版本号时再通过_probe运行 ``--version``。
+        """
+        return self._which(command) is not None
+
     def _get_current_version(self) -> str:
-        """从pyproject.toml获取当前版本"""
-        pyproject_path = os.path.join(self.config.project_dir, "pyproject.toml")
-        if not os.path.exists(pyproject_path):
+        """从pyproject.toml获取当前版本
+
+        文件内容只读取一次并缓存在_pyproject_bytes中，同时记录版本号字面量的
+        字节区间，更新版本时直接替换该区间，无需重新读取和扫描整个文件。
+        """
+        pyproject_path = self.config.project_dir / "pyproject.toml"
+        try:
+            self._pyproject_bytes = pyproject_path.read_bytes()
+        except FileNotFoundError:
             raise CICDError(f"pyproject.toml不存在: {pyproject_path}")
 
-        with open(pyproject_path, "rb") as f:
-            data: dict[str, object] = tomllib.load(f)
-            project_data = data.get("project")
-            if not isinstance(project_data, dict):
-                raise CICDError("pyproject.toml中缺少project配置")
-            version = project_data.get("version")
-            if not isinstance(version, str):
-                raise CICDError("无法从pyproject.toml获取版本号")
-            return version
+        data: dict[str, object] = tomllib.loads(self._pyproject_bytes.decode("utf-8"))
+        project_data = data.get("project")
+        if not isinstance(project_data, dict):
+            raise CICDError("pyproject.toml中缺少project配置")
+        version = project_data.get("version")
+        if not isinstance(version, str):
+            raise CICDError("无法从pyproject.toml获取版本号")
+
+        encoded = version.encode("utf-8")
+        self._version_span = next(
+            (
+                match.span("v")
+                for match in self._VERSION_RE.finditer(self._pyproject_bytes)
+                if match.group("v") == encoded
+            ),
+            None,
+        )
+        return version
 
     def _bump_version(self, bump_type: str) -> str:
         """更新版本号
@@ -292,18 +953,17 @@ class CICD:
 
         new_version = f"{version_parts[0]}.{version_parts[1]}.{version_parts[2]}"
 
-        pyproject_path = os.path.join(self.config.project_dir, "pyproject.toml")
-        with open(pyproject_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        content = re.sub(
-            rf'version = "{self.current_version}"',
-            f'version = "{new_version}"',
-            content,
+        if self._version_span is None:
+            raise CICDError(f"pyproject.toml中未找到版本号: {self.current_version}")
+        start, end = self._version_span
+        content = (
+            self._pyproject_bytes[:start]
+            + new_version.encode("utf-8")
+            + self._pyproject_bytes[end:]
         )
-
-        with open(pyproject_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        (self.config.project_dir / "pyproject.toml").write_bytes(content)
+        self._pyproject_bytes = content
+        self._version_span = (start, start + len(new_version))
 
         self.logger.info(f"版本号已更新: {self.current_version} -> {new_version}")
         print_color(
@@ -312,46 +972,47 @@ class CICD:
 
         return new_version
 
-    def setup_environment(self) -> bool:
-        """环境准备（CI功能）"""
-        if self.config.skip_env_prep:
-            self.logger.info("跳过环境准备")
-            return True
-
-        print_section("环境准备")
+    def _check_python_version(self) -> bool:
+        """检查当前解释器版本是否满足要求
 
+        CI/CD脚本本身就运行在目标解释器上，直接读取sys.version_info并按元组比较，
+        无需启动子进程，也不会出现"3.12"子串误匹配"13.12"的问题。
+        """
         print_subsection("检查Python版本")
-        python_cmd = None
-        if self._command_exists("python"):
-            python_cmd = "python"
-        elif self._command_exists("python3"):
-            python_cmd = "python3"
-        else:
-            self.logger.error("Python未安装")
-            print_color("❌ Python未安装", "red")
-            return False
-
-        version_cmd = [python_cmd, "--version"]
-        result = subprocess.run(version_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            self.logger.error("无法获取Python版本")
-            print_color("❌ 无法获取Python版本", "red")
-            return False
-
-        version_output = result.stdout.strip()
+        current = sys.version_info[:3]
+        version_output = "Python " + ".".join(map(str, current))
         self.logger.info(f"当前Python版本: {version_output}")
         print_color(f"ℹ️ 当前Python版本: {version_output}", "blue")
 
-        if self.config.python_version not in version_output:
+        try:
+            required = tuple(map(int, self.config.python_version.split(".")))
+        except ValueError:
+            self.logger.error(f"无效的Python版本要求: {self.config.python_version}")
+            print_color(f"❌ 无效的Python版本要求: {self.config.python_version}", "red")
+            return False
+
+        if current[: len(required)] < required:
             self.logger.error(f"需要Python {self.config.python_version}或更高版本")
             print_color(f"❌ 需要Python {self.config.python_version}或更高版本", "red")
             return False
 
         print_color("✅ Python版本符合要求", "green")
+        return True
+
+    def setup_environment(self) -> bool:
+        """环境准备（CI功能）"""
+        if self.config.skip_env_prep:
+            self.logger.info("跳过环境准备")
+            return True
+
+        print_section("环境准备")
+
+        if not self._check_python_version():
+            return False
 
         print_subsection("安装uv依赖管理工具")
         if self._command_exists("uv"):
-            result = subprocess.run(["uv", "--version"], capture_output=True, text=True)
+            result = _probe(("uv", "--version"))
             if result.returncode == 0:
                 current_version = result.stdout.strip()
                 self.logger.info(f"uv已经安装: {current_version}")
@@ -359,19 +1020,21 @@ class CICD:
             else:
                 self.logger.error("无法获取uv版本")
                 print_color("⚠️ 无法获取uv版本，尝试重新安装", "yellow")
-                cmd = [python_cmd, "-m", "pip", "install", "uv"]
+                cmd = [sys.executable, "-m", "pip", "install", "uv"]
                 success, _ = self._run_command(cmd, quiet=True)
                 if not success:
                     self.logger.error("uv安装失败")
                     print_color("❌ uv安装失败", "red")
                     return False
+                self._refresh_tool_lookups()
         else:
-            cmd = [python_cmd, "-m", "pip", "install", "uv"]
+            cmd = [sys.executable, "-m", "pip", "install", "uv"]
             success, _ = self._run_command(cmd, quiet=True)
             if not success:
                 self.logger.error("uv安装失败")
                 print_color("❌ uv安装失败", "red")
                 return False
+            self._refresh_tool_lookups()
             print_color("✅ uv安装成功", "green")
 
         print_color("✅ 环境准备完成", "green")
@@ -381,42 +1044,18 @@ class CICD:
         """检查部署环境（CD功能）"""
         print_section("检查部署环境")
 
-        print_subsection("检查Python版本")
-        python_cmd = None
-        if self._command_exists("python"):
-            python_cmd = "python"
-        elif self._command_exists("python3"):
-            python_cmd = "python3"
-        else:
-            self.logger.error("Python未安装")
-            print_color("❌ Python未安装", "red")
-            return False
+        self._prefetch_versions("uv", "git")
 
-        version_cmd = [python_cmd, "--version"]
-        result = subprocess.run(version_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            self.logger.error("无法获取Python版本")
-            print_color("❌ 无法获取Python版本", "red")
+        if not self._check_python_version():
             return False
 
-        version_output = result.stdout.strip()
-        self.logger.info(f"当前Python版本: {version_output}")
-        print_color(f"ℹ️ 当前Python版本: {version_output}", "blue")
-
-        if self.config.python_version not in version_output:
-            self.logger.error(f"需要Python {self.config.python_version}或更高版本")
-            print_color(f"❌ 需要Python {self.config.python_version}或更高版本", "red")
-            return False
-
-        print_color("✅ Python版本符合要求", "green")
-
         print_subsection("检查uv依赖管理工具")
         if not self._command_exists("uv"):
             self.logger.error("uv未安装")
             print_color("❌ uv未安装", "red")
             return False
 
-        result = subprocess.run(["uv", "--version"], capture_output=True, text=True)
+        result = _probe(("uv", "--version"))
         if result.returncode == 0:
             uv_version = result.stdout.strip()
             self.logger.info(f"uv版本: {uv_version}")
@@ -430,11 +1069,8 @@ class CICD:
         if not self._command_exists("git"):
             self.logger.warning("Git未安装，将跳过Git相关操作")
             print_color("⚠️ Git未安装，将跳过Git相关操作", "yellow")
-            self.config.skip_git = True
         else:
-            result = subprocess.run(
-                ["git", "--version"], capture_output=True, text=True
-            )
+            result = _probe(("git", "--version"))
             if result.returncode == 0:
                 git_version = result.stdout.strip()
                 self.logger.info(f"Git版本: {git_version}")
@@ -460,6 +1096,7 @@ class CICD:
             cmd = ["uv", "pip", "install", "-e", ".", "--group", "dev", "--system"]
         else:
             cmd = ["uv", "pip", "install", "-e", ".[dev]"]
+        cmd.extend(TOOL_DEPS)
 
         success, _ = self._run_command(cmd, cwd=self.config.project_dir)
         if not success:
@@ -467,39 +1104,92 @@ class CICD:
             print_color("❌ 项目依赖安装失败", "red")
             return False
 
+        # 新安装的工具可能出现在PATH中，重建命令查找缓存
+        self._refresh_tool_lookups()
+
+        if self.config.use_worker:
+            # 工具已就绪，提前启动常驻工具进程，使其导入工具与后续阶段重叠进行
+            with self._worker_lock:
+                if self._worker_conn is None and not self._worker_failed:
+                    try:
+                        self._start_worker()
+                    except OSError as e:
+                        self.logger.warning(f"常驻工具进程启动失败: {e}")
+                        self._worker_failed = True
+                        self._stop_worker()
+
         print_color("✅ 项目依赖安装成功", "green")
         return True
 
-    def check_code_format(self) -> bool:
-        """代码规范检查Linting（共享功能）"""
+    def _find_tool(self, tool: str) -> Optional[str]:
+        """在项目虚拟环境和PATH中查找开发工具的可执行文件
+
+        Args:
+            tool: 工具名称
+
+        Returns:
+            可执行文件路径，未找到时返回None
+        """
+        return self._venv_tool(tool) or self._which(tool)
+
+    def _venv_tool(self, tool: str) -> Optional[str]:
+        """仅在项目虚拟环境（.venv）中查找工具的可执行文件"""
+        bin_dir = "Scripts" if os.name == "nt" else "bin"
+        venv_bin = self.config.project_dir / ".venv" / bin_dir
+        return shutil.which(tool, path=str(venv_bin))
+
+    def _tool_command(self, tool: str) -> List[str]:
+        """Python工具（mypy、pytest、python等）的命令前缀
+
+        项目虚拟环境中存在该工具时直接调用，省去`uv run`每次启动时的环境解析与
+        锁文件同步；否则回退到`uv run`。不使用PATH中的同名工具，以免误用其他环境。
+        """
+        path = self._venv_tool(tool)
+        return [path] if path else ["uv", "run", tool]
+
+    def _ruff_command(self) -> List[str]:
+        """定位ruff可执行文件
+
+        ruff是独立的二进制程序，优先直接调用项目虚拟环境或PATH中的ruff，
+        省去`uv run`包装带来的一次解释器启动；都找不到时回退到`uv run ruff`。
+        """
+        ruff = self._find_tool("ruff")
+        return [ruff] if ruff else ["uv", "run", "ruff"]
+
+    def lint_and_format(self) -> bool:
+        """代码格式化与规范检查（CI功能）
+
+        先执行`ruff format`，再执行一次`ruff check`；启用自动修复时，
+        修复与检查合并在同一次`ruff check --fix`调用中完成。
+        """
         if self.config.skip_format:
-            self.logger.info("跳过代码规范检查")
+            self.logger.info("跳过代码格式化与规范检查")
             return True
 
-        print_section("代码规范检查Linting")
+        print_section("代码格式化与规范检查")
+        ruff = self._ruff_command()
+
+        print_subsection("使用ruff格式化代码")
+        success, _ = self._run_command(
+            [*ruff, "format", "."], cwd=self.config.project_dir
+        )
+        if not success:
+            self.logger.error("代码格式化失败")
+            print_color("❌ 代码格式化失败", "red")
+            return False
+
+        print_color("✅ 代码格式化完成", "green")
 
+        cmd = [*ruff, "check", f"--output-format={self.config.ruff_output_format}"]
         if self.config.auto_fix:
-            print_subsection("使用ruff自动修复代码规范问题")
+            print_subsection("使用ruff检查并自动修复代码规范问题")
             print_subsection(
                 "注意：自动修复只能解决部分问题（如未使用的导入、变量、导入排序等）"
             )
-            cmd = ["uv", "run", "ruff", "check", "--fix", "."]
-            success, output = self._run_command(cmd, cwd=self.config.project_dir)
-            if not success:
-                self.logger.error("代码规范规范修复失败")
-                print_color("❌ 代码规范自动修复失败", "red")
-                return False
-            print_color("✅ 代码规范自动修复完成", "green")
-
-        print_subsection("使用ruff检查代码规范")
-        cmd = [
-            "uv",
-            "run",
-            "ruff",
-            "check",
-            f"--output-format={self.config.ruff_output_format}",
-            ".",
-        ]
+            cmd.append("--fix")
+        else:
+            print_subsection("使用ruff检查代码规范")
+        cmd.append(".")
         success, _ = self._run_command(cmd, cwd=self.config.project_dir)
         if not success:
             self.logger.error("代码规范检查失败")
@@ -509,24 +1199,17 @@ class CICD:
         print_color("✅ 代码规范检查通过", "green")
         return True
 
-    def format_code(self) -> bool:
-        """代码格式化（CI功能）"""
-        if self.config.skip_format:
-            self.logger.info("跳过代码格式化")
-            return True
-
-        print_section("代码格式化（Formatting）")
-
-        print_subsection("使用ruff格式化代码")
-        cmd = ["uv", "run", "ruff", "format", "."]
-        success, _ = self._run_command(cmd, cwd=self.config.project_dir)
-        if not success:
-            self.logger.error("代码格式化失败")
-            print_color("❌ 代码格式化失败", "red")
-            return False
-
-        print_color("✅ 代码格式化完成", "green")
-        return True
+    def _mypy_args(self) -> List[str]:
+        """mypy命令行参数"""
+        args = [
+            "--namespace-packages",
+            "--ignore-missing-imports",
+            "--follow-imports=skip",
+        ]
+        if self.config.mypy_strict:
+            args.append("--strict")
+        args.append("src/")
+        return args
 
     def type_check(self) -> bool:
         """类型检查（共享功能）"""
@@ -539,26 +1222,11 @@ class CICD:
         print_subsection("使用mypy进行类型检查")
 
         original_pythonpath = os.environ.get("PYTHONPATH", "")
-        src_path = os.path.abspath(os.path.join(self.config.project_dir, "src"))
-        separator = ";" if os.name == "nt" else ":"
-        os.environ["PYTHONPATH"] = src_path + separator + original_pythonpath
+        env = {
+            "PYTHONPATH": str(self.config.src_dir) + os.pathsep + original_pythonpath
+        }
 
-        try:
-            cmd = [
-                "uv",
-                "run",
-                "mypy",
-                "--namespace-packages",
-                "--ignore-missing-imports",
-                "--follow-imports=skip",
-            ]
-            if self.config.mypy_strict:
-                cmd.append("--strict")
-            cmd.append("src/")
-
-            success, _ = self._run_command(cmd, cwd=self.config.project_dir)
-        finally:
-            os.environ["PYTHONPATH"] = original_pythonpath
+        success = self._run_tool("mypy", self._mypy_args(), env=env)
         if not success:
             self.logger.error("类型检查失败")
             print_color("❌ 类型检查失败", "red")
@@ -575,30 +1243,27 @@ class CICD:
 
         print_section("运行代码检查")
 
-        print_subsection("使用ruff代码规范检查（Linting）")
-        cmd = ["uv", "run", "ruff", "check", "--output-format=github", "."]
-        success, _ = self._run_command(cmd, cwd=self.config.project_dir)
-        if not success:
+        ruff_cmd = [*self._ruff_command(), "check", "--output-format=github", "."]
+        if self.config.use_worker:
+            # mypy在常驻工具进程中执行，按顺序运行两项检查
+            print_subsection("使用ruff代码规范检查（Linting）")
+            lint_success, _ = self._run_command(ruff_cmd, cwd=self.config.project_dir)
+            type_success = lint_success and self._run_tool("mypy", self._mypy_args())
+        else:
+            print_subsection("并发运行ruff代码规范检查和mypy类型检查")
+            mypy_cmd = [*self._tool_command("mypy"), *self._mypy_args()]
+            (lint_success, _), (type_success, _) = self._run_async(
+                self._run_many([ruff_cmd, mypy_cmd], cwd=self.config.project_dir)
+            )
+
+        if not lint_success:
             self.logger.error("代码规范检查失败")
             print_color("❌ 代码规范检查失败", "red")
             return False
 
         print_color("✅ 代码规范检查通过", "green")
 
-        print_subsection("使用mypy进行类型检查")
-        cmd = [
-            "uv",
-            "run",
-            "mypy",
-            "--namespace-packages",
-            "--ignore-missing-imports",
-            "--follow-imports=skip",
-        ]
-        if self.config.mypy_strict:
-            cmd.append("--strict")
-        cmd.append("src/")
-        success, _ = self._run_command(cmd, cwd=self.config.project_dir)
-        if not success:
+        if not type_success:
             self.logger.error("类型检查失败")
             print_color("❌ 类型检查失败", "red")
             return False
@@ -607,55 +1272,64 @@ class CICD:
         print_color("✅ 所有代码检查通过", "green")
         return True
 
+    def _test_results_path(self) -> str:
+        """JUnit测试报告路径"""
+        return os.path.join(
+            self.config.project_dir,
+            "reports",
+            "test-results",
+            self.config.test_results_file,
+        )
+
     def run_tests(self) -> bool:
         """运行测试（共享功能）"""
-        if self.config.skip_tests:
+        # 取一次配置快照，后续构建命令时直接读取局部变量
+        config = self.config
+        if config.skip_tests:
             self.logger.info("跳过测试执行")
             return True
 
         print_section("运行测试")
 
-        if not self.config.skip_nltk:
+        if not config.skip_nltk:
             print_subsection("下载NLTK数据")
-            nltk_download_cmd = ["uv", "run", "python", "Scripts/download_nltk_data.py"]
-            nltk_success, nltk_output = self._run_command(
-                nltk_download_cmd, cwd=self.config.project_dir
-            )
+            nltk_success = self._run_tool("python", ["Scripts/download_nltk_data.py"])
             if not nltk_success:
                 self.logger.warning("NLTK数据下载失败，继续执行测试")
                 print_color("⚠️ NLTK数据下载失败，继续执行测试", "yellow")
             else:
                 print_color("✅ NLTK数据下载成功", "green")
 
-        test_results_dir = os.path.join(
-            self.config.project_dir, "reports", "test-results"
-        )
-        os.makedirs(test_results_dir, exist_ok=True)
-        test_results_file = os.path.join(test_results_dir, "test-results.xml")
+        test_results_file = self._test_results_path()
+        os.makedirs(os.path.dirname(test_results_file), exist_ok=True)
 
         print_subsection("使用pytest运行测试并生成报告")
-        cmd = ["uv", "run", "pytest", "tests/"]
-        cmd.extend(["-n", "auto"])
-        if self.config.pytest_verbose:
+        cmd = ["tests/"]
+        # 按文件分发测试，同一文件的测试共享模块级fixture和导入缓存
+        cmd.extend(["-n", "auto", "--dist=loadfile"])
+        if config.pytest_verbose:
             cmd.append("-v")
-        if self.config.pytest_tb_style:
-            cmd.append(f"--tb={self.config.pytest_tb_style}")
+        if config.pytest_tb_style:
+            cmd.append(f"--tb={config.pytest_tb_style}")
         cmd.extend(["--junitxml", test_results_file])
 
-        if self.config.pytest_k:
-            cmd.extend(["-k", self.config.pytest_k])
+        if config.pytest_k:
+            cmd.extend(["-k", config.pytest_k])
 
-        if self.config.coverage_enabled and not self.config.skip_coverage:
+        if config.coverage_enabled and not config.skip_coverage:
             cmd.extend(
                 [
                     "--cov=src",
                     "--cov-report=xml",
                     "--cov-report=html",
-                    f"--cov-fail-under={self.config.coverage_threshold}",
+                    f"--cov-fail-under={config.coverage_threshold}",
                 ]
             )
+        else:
+            # 显式关闭pytest-cov，避免配置或环境变量启用的覆盖率插桩拖慢xdist
+            cmd.append("--no-cov")
 
-        success, _ = self._run_command(cmd, cwd=self.config.project_dir)
+        success = self._run_tool("pytest", cmd)
         if not success:
             self.logger.error("测试执行失败")
             print_color("❌ 测试执行失败", "red")
@@ -663,48 +1337,87 @@ class CICD:
 
         print_color("✅ 测试执行成功", "green")
         print_color(f"✅ 测试报告生成成功: {test_results_file}", "green")
-        if self.config.coverage_enabled:
+        if config.coverage_enabled:
             print_color("✅ 覆盖率报告生成成功", "green")
         return True
 
-    def generate_test_report(self) -> bool:
-        """生成测试报告（CI功能）"""
-        if self.config.skip_tests:
-            self.logger.info("跳过测试报告生成")
-            return True
-
-        print_section("生成测试报告")
-
-        test_results_dir = os.path.join(
-            self.config.project_dir, "reports", "test-results"
-        )
-        test_results_file = os.path.join(test_results_dir, "test-results.xml")
+    def _src_shards(self) -> List[List[str]]:
+        """按顶层包将src划分为分片，供逐文件分析的工具作为独立进程并发检查
 
-        if os.path.exists(test_results_file):
-            print_subsection("测试报告已存在")
-            print_color(f"✅ 测试报告已存在: {test_results_file}", "green")
-            return True
-        else:
-            print_subsection("生成JUnit测试报告")
-            os.makedirs(test_results_dir, exist_ok=True)
-            cmd = [
-                "uv",
-                "run",
-                "pytest",
-                "tests/",
-                "--junitxml",
-                test_results_file,
-                "-n",
-                "auto",
+        只适用于不依赖其他文件的分析（如bandit）；mypy需要跨模块的类型信息，
+        分片后会把其他分片的模块当作Any，因此始终整体检查src。
+        分片数不超过CPU核数，各顶层包按Python文件数从多到少依次分配给
+        当前文件数最少的分片。单核或只有一个顶层包时整体检查src。
+        """
+        src_dir = self.config.project_dir / "src"
+        weights: List[Tuple[int, str]] = []
+        try:
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    if entry.is_dir() and not entry.name.startswith((".", "__")):
+                        count = sum(1 for _ in Path(entry.path).rglob("*.py"))
+                        if count:
+                            weights.append((count, entry.name))
+                    elif entry.name.endswith(".py") and entry.is_file():
+                        weights.append((1, entry.name))
+        except OSError:
+            weights = []
+
+        jobs = min(os.cpu_count() or 1, len(weights))
+        if jobs <= 1:
+            return [["src/"]]
+
+        shards: List[Tuple[int, List[str]]] = [(0, []) for _ in range(jobs)]
+        for count, name in sorted(weights, reverse=True):
+            index = min(range(jobs), key=lambda i: shards[i][0])
+            total, targets = shards[index]
+            targets.append(f"src/{name}")
+            shards[index] = (total + count, targets)
+        return [sorted(targets) for _, targets in shards]
+
+    def _run_bandit_shards(
+        self, bandit: str, shards: List[List[str]], report_file: str
+    ) -> bool:
+        """各分片作为独立的bandit进程并发运行，合并为一份JSON报告
+
+        bandit逐文件分析，合并后的问题列表和统计与整体检查src一致。
+        任一分片没有生成报告时不写入合并报告，并返回False。
+        """
+        Path(report_file).unlink(missing_ok=True)
+        with tempfile.TemporaryDirectory(prefix="bandit-") as tmp_dir:
+            shard_files = [
+                os.path.join(tmp_dir, f"shard-{i}.json") for i in range(len(shards))
             ]
-            success, _ = self._run_command(cmd, cwd=self.config.project_dir, quiet=True)
-            if not success:
-                self.logger.error("测试报告生成失败")
-                print_color("❌ 测试报告生成失败", "red")
-                return False
-
-            print_color(f"✅ 测试报告生成成功: {test_results_file}", "green")
-            return True
+            cmds = [
+                [bandit, "-r", *targets, "-f", "json", "-o", shard_file, "-ll"]
+                for targets, shard_file in zip(shards, shard_files)
+            ]
+            results = self._run_async(self._run_many(cmds, cwd=self.config.project_dir))
+
+            merged: Dict[str, Any] = {"errors": [], "results": [], "metrics": {}}
+            totals: Dict[str, int] = {}
+            for shard_file in shard_files:
+                try:
+                    with open(shard_file, "r", encoding="utf-8") as f:
+                        report = json.load(f)
+                except (OSError, ValueError):
+                    return False
+                merged.setdefault("generated_at", report.get("generated_at"))
+                merged["errors"].extend(report.get("errors", []))
+                # 直接作为目标的文件带有"./"前缀，统一为与整体检查相同的路径
+                for result in report.get("results", []):
+                    result["filename"] = os.path.normpath(result["filename"])
+                    merged["results"].append(result)
+                metrics = report.get("metrics", {})
+                for key, value in metrics.pop("_totals", {}).items():
+                    totals[key] = totals.get(key, 0) + value
+                for filename, file_metrics in metrics.items():
+                    merged["metrics"][os.path.normpath(filename)] = file_metrics
+
+        merged["metrics"]["_totals"] = totals
+        with open(report_file, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+        return all(ok for ok, _ in results)
 
     def run_security_check(self) -> bool:
         """运行安全检查（CI功能）"""
@@ -714,14 +1427,11 @@ class CICD:
 
         print_section("安全检查")
 
-        print_subsection("安装安全检查工具bandit")
-        cmd = ["uv", "pip", "install", "bandit"]
-        install_success, _ = self._run_command(
-            cmd, cwd=self.config.project_dir, quiet=True
-        )
-        if not install_success:
-            self.logger.warning("bandit安装失败，跳过安全检查")
-            print_color("⚠️ bandit安装失败，跳过安全检查", "yellow")
+        # bandit是项目依赖，已在依赖安装阶段安装，此处不再单独安装
+        bandit = self._find_tool("bandit")
+        if bandit is None:
+            self.logger.warning("未找到bandit，跳过安全检查")
+            print_color("⚠️ 未找到bandit，跳过安全检查", "yellow")
             return True
 
         security_dir = os.path.join(self.config.project_dir, "reports", "security")
@@ -729,24 +1439,24 @@ class CICD:
 
         print_subsection("使用bandit进行安全检查")
         security_report_file = os.path.join(security_dir, "security-report.json")
-        cmd = [
-            "uv",
-            "run",
-            "bandit",
-            "-r",
-            "src/",
-            "-f",
-            "json",
-            "-o",
-            security_report_file,
-            "-ll",
-        ]
-        success, _ = self._run_command(cmd, cwd=self.config.project_dir, quiet=True)
+        shards = self._src_shards()
+        if len(shards) == 1:
+            cmd = [
+                bandit,
+                "-r",
+                "src/",
+                "-f",
+                "json",
+                "-o",
+                security_report_file,
+                "-ll",
+            ]
+            success, _ = self._run_command(cmd, cwd=self.config.project_dir, quiet=True)
+        else:
+            success = self._run_bandit_shards(bandit, shards, security_report_file)
 
         if os.path.exists(security_report_file):
             with open(security_report_file, "r", encoding="utf-8") as f:
-                import json
-
                 report = json.load(f)
 
             high_severity_count = (
@@ -801,16 +1511,19 @@ class CICD:
         build_dir = os.path.join(self.config.project_dir, "build")
         dist_dir = os.path.join(self.config.project_dir, self.config.build_dir)
 
-        if os.path.exists(build_dir):
-            shutil.rmtree(build_dir)
-            self.logger.info(f"删除build目录: {build_dir}")
-
-        if os.path.exists(dist_dir):
-            shutil.rmtree(dist_dir)
-            self.logger.info(f"删除dist目录: {dist_dir}")
+        # 两个目录互不相关，并行删除；shutil.rmtree在支持的平台上已基于
+        # os.scandir和目录文件描述符遍历，无需逐项stat
+        stale_dirs = {
+            path: label
+            for path, label in ((build_dir, "build"), (dist_dir, "dist"))
+            if os.path.exists(path)
+        }
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            for path, _ in zip(stale_dirs, executor.map(shutil.rmtree, stale_dirs)):
+                self.logger.info(f"删除{stale_dirs[path]}目录: {path}")
 
         print_subsection("使用setuptools构建包")
-        cmd = ["uv", "run", "python", "-m", "build"]
+        cmd = [*self._tool_command("python"), "-m", "build"]
         success, _ = self._run_command(cmd, cwd=self.config.project_dir)
         if not success:
             self.logger.error("包构建失败")
@@ -823,12 +1536,11 @@ class CICD:
             return False
 
         print_subsection("构建产物")
-        build_artifacts = os.listdir(dist_dir)
-        for artifact in build_artifacts:
-            artifact_path = os.path.join(dist_dir, artifact)
-            file_size = os.path.getsize(artifact_path)
-            self.logger.info(f"构建产物: {artifact} ({file_size} bytes)")
-            print_color(f"  📦 {artifact} ({file_size} bytes)", "blue")
+        with os.scandir(dist_dir) as entries:
+            for entry in entries:
+                file_size = entry.stat().st_size
+                self.logger.info(f"构建产物: {entry.name} ({file_size} bytes)")
+                print_color(f"  📦 {entry.name} ({file_size} bytes)", "blue")
 
         print_color("✅ 包构建成功", "green")
         return True
@@ -858,17 +1570,28 @@ class CICD:
         print_subsection("使用twine发布包")
         dist_dir = os.path.join(self.config.project_dir, self.config.build_dir)
 
-        if not self._command_exists("twine"):
-            self.logger.info("安装twine")
-            print_subsection("安装twine")
-            cmd = ["uv", "pip", "install", "twine"]
-            success, _ = self._run_command(cmd, cwd=self.config.project_dir, quiet=True)
-            if not success:
-                self.logger.error("twine安装失败")
-                print_color("❌ twine安装失败", "red")
-                return False
+        # 已安装twine（如CI的dev依赖组）时直接调用，否则通过uvx在uv的工具缓存中运行
+        twine = self._find_tool("twine")
+        twine_cmd = [twine] if twine else ["uvx", "twine"]
 
-        cmd = ["twine", "upload", "--repository-url", index_url, dist_dir + "/*"]
+        # 显式列出构建产物，不依赖通配符展开（Windows下不会展开"*"）
+        try:
+            with os.scandir(dist_dir) as entries:
+                artifacts = sorted(
+                    entry.path
+                    for entry in entries
+                    if entry.is_file() and entry.name.endswith((".whl", ".tar.gz"))
+                )
+        except FileNotFoundError:
+            artifacts = []
+        if not artifacts:
+            self.logger.error(f"未找到可发布的构建产物: {dist_dir}")
+            print_color(f"❌ 未找到可发布的构建产物: {dist_dir}", "red")
+            return False
+        for artifact in artifacts:
+            self.logger.info(f"待发布: {artifact}")
+
+        cmd = [*twine_cmd, "upload", "--repository-url", index_url, *artifacts]
         success, _ = self._run_command(cmd, cwd=self.config.project_dir)
         if not success:
             self.logger.error("包发布失败")
@@ -878,6 +1601,21 @@ class CICD:
         print_color(f"✅ 包成功发布到{repository_name}", "green")
         return True
 
+    def _confirm(self, prompt: str, default: bool = False) -> bool:
+        """向用户确认操作
+
+        指定了 --yes/--no 时直接使用该答案；CI环境或标准输入不是终端时
+        不再阻塞等待输入，返回默认答案。
+        """
+        if self.config.assume_answer is not None:
+            return self.config.assume_answer
+        if os.environ.get("CI") == "true" or not sys.stdin.isatty():
+            self.logger.info(
+                f"非交互环境，使用默认答案: {prompt}{'y' if default else 'n'}"
+            )
+            return default
+        return input(prompt).lower() == "y"
+
     def manage_git_tags(self) -> bool:
         """管理Git标签（CD功能）"""
         if self.config.skip_git:
@@ -900,8 +1638,7 @@ class CICD:
             self.logger.warning("Git仓库有未提交的更改")
             print_color("⚠️ Git仓库有未提交的更改，建议先提交更改", "yellow")
             if not self.config.dry_run:
-                response = input("是否继续？(y/N): ")
-                if response.lower() != "y":
+                if not self._confirm("是否继续？(y/N): "):
                     self.logger.info("用户取消操作")
                     return False
 
@@ -917,8 +1654,7 @@ class CICD:
                 self.logger.warning(f"Git标签已存在: {tag_name}")
                 print_color(f"⚠️ Git标签已存在: {tag_name}", "yellow")
                 if not self.config.dry_run:
-                    response = input("是否删除现有标签并重新创建？(y/N): ")
-                    if response.lower() == "y":
+                    if self._confirm("是否删除现有标签并重新创建？(y/N): "):
                         cmd = ["git", "tag", "-d", tag_name]
                         self._run_command(cmd, cwd=self.config.project_dir)
                     else:
@@ -955,132 +1691,294 @@ class CICD:
         print_color("✅ Git标签管理完成", "green")
         return True
 
-    def run_ci(self) -> bool:
-        """运行完整CI流程"""
-        self.logger.info("开始CI流程")
-        start_time = time.time()
+    def _cache_key(self, stage_key: str) -> str:
+        """计算阶段输入的摘要
 
-        stages = [
-            ("环境准备", self.setup_environment),
-            ("依赖安装", self.install_dependencies),
-            ("代码规范检查", self.check_code_format),
-            ("代码格式化", self.format_code),
-            ("类型检查", self.type_check),
-            ("测试执行", self.run_tests),
-            ("测试报告生成", self.generate_test_report),
-            ("安全检查", self.run_security_check),
-        ]
+        覆盖STAGE_INPUTS中匹配的文件的路径、修改时间和大小、STAGE_CONFIG_FIELDS
+        中该阶段读取的配置字段以及虚拟环境的site-packages目录的修改时间，
+        任一文件被修改、新增或删除，相关配置（如跳过选项、严格模式）变化，
+        或在虚拟环境中安装、升级、卸载包都会改变摘要。
+        只读取目录项中的文件信息，不读取文件内容。
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for field in self.STAGE_CONFIG_FIELDS[stage_key]:
+            h.update(f"{field}={getattr(self.config, field)!r}\n".encode("utf-8"))
+        patterns = self.STAGE_INPUTS[stage_key]
+        for rel, mtime_ns, size in _scan_inputs(self.config.project_dir, patterns):
+            h.update(f"{rel}\0{mtime_ns}\0{size}\n".encode("utf-8"))
+        # 安装或卸载包会增删site-packages中的目录，从而更新该目录的修改时间
+        venv = self.config.project_dir / ".venv"
+        for site_packages in sorted(
+            [*venv.glob("lib/python*/site-packages"), *venv.glob("Lib/site-packages")]
+        ):
+            try:
+                mtime_ns = site_packages.stat().st_mtime_ns
+            except OSError:
+                continue
+            h.update(f"{site_packages}\0{mtime_ns}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def _stamp_path(self, stage_key: str, suffix: str = ".stamp") -> Path:
+        """阶段戳文件路径（失败标记使用 .failed 后缀）"""
+        return self.config.cache_dir / f"{stage_key}{suffix}"
+
+    def _run_cached_stage(self, stage_func: StageFunc) -> Optional[bool]:
+        """执行可缓存的阶段
+
+        输入摘要与上次成功时写入的戳文件一致且没有失败标记时直接跳过，返回None；
+        否则执行阶段，成功后按执行后的输入重新计算摘要并写入戳文件
+        （格式化阶段可能修改文件），失败时删除戳文件并写入失败标记，
+        保证缓存不会掩盖失败状态。
+        """
+        stage_key = stage_func.__name__
+        stamp_path = self._stamp_path(stage_key)
+        failed_path = self._stamp_path(stage_key, ".failed")
+        try:
+            stamp = stamp_path.read_text(encoding="utf-8")
+        except OSError:
+            stamp = None
+        if (
+            stamp is not None
+            and not failed_path.exists()
+            and stamp == self._cache_key(stage_key)
+        ):
+            return None
+
+        success = stage_func()
+        stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        if success:
+            stamp_path.write_text(self._cache_key(stage_key), encoding="utf-8")
+            failed_path.unlink(missing_ok=True)
+        else:
+            stamp_path.unlink(missing_ok=True)
+            failed_path.write_text(self._cache_key(stage_key), encoding="utf-8")
+        return success
 
-        all_success = True
-        for stage_name, stage_func in stages:
-            self.logger.info(f"开始{stage_name}")
-            if not stage_func():
-                all_success = False
-                self.logger.warning(f"{stage_name}失败")
-            self.logger.info(f"{stage_name}完成")
-
-        print_section("CI流程总结")
-        duration = time.time() - start_time
+    def _run_stage(self, stage_name: str, stage_func: StageFunc) -> bool:
+        """执行单个阶段（在线程池的工作线程中调用）
 
-        if all_success:
-            self.logger.info("所有CI步骤通过")
-            print_color("🎉 所有CI步骤通过!", "green")
-            print_color(f"⏱️ 总耗时: {duration:.2f}秒", "blue")
+        阶段执行期间，本线程的命令都在同一个事件循环中运行（见_run_async）。
+        执行结果记入_results，由_finalize统一写入日志和总结表。
+        """
+        start_time = time.perf_counter()
+        with asyncio.Runner() as runner:
+            self._local.runner = runner
+            try:
+                if (
+                    not self.config.use_cache
+                    or stage_func.__name__ not in self.STAGE_INPUTS
+                ):
+                    success: Optional[bool] = stage_func()
+                else:
+                    success = self._run_cached_stage(stage_func)
+                    if success is None:
+                        print_color(f"⏭️ {stage_name}输入未变化，跳过", "blue")
+            finally:
+                self._local.runner = None
+
+        if success is None:
+            status = "cached"
         else:
-            self.logger.error("部分CI步骤失败")
-            print_color("❌ 部分CI步骤失败!", "red")
-            print_color(f"⏱️ 总耗时: {duration:.2f}秒", "blue")
+            status = "passed" if success else "failed"
+        # list.append是原子操作，并发阶段可以直接追加
+        self._results.append(
+            _StageResult(
+                stage_name,
+                stage_func.__name__,
+                status,
+                time.perf_counter() - start_time,
+            )
+        )
+        return success is not False
 
-        return all_success
+    def _run_stage_graph(self, stages: List[Stage]) -> bool:
+        """按STAGE_DEPENDENCIES描述的依赖图执行阶段
 
-    def run_cd(self) -> bool:
-        """运行完整CD流程"""
-        self.logger.info("开始CD流程")
-        start_time = time.time()
+        使用graphlib.TopologicalSorter对本次运行的阶段做拓扑调度：
+        依赖全部完成的阶段立即提交到线程池，任一阶段结束后即标记完成并取出新的就绪阶段，
+        不必等待同一批次中最慢的阶段；各阶段的耗时主要在子进程中，
+        线程等待子进程时会释放GIL，因此线程即可实现并发。
+        必需阶段（如环境准备、依赖安装）失败时不再提交剩余阶段，
+        避免在损坏的环境中继续运行检查和测试。
+        启用 --serial 时同一时刻只运行一个阶段，按拓扑顺序逐个执行。
 
-        if self.config.version_bump:
-            print_section("版本管理")
-            new_version = self._bump_version(self.config.version_bump)
-            self.current_version = new_version
-
-        stages = [
-            ("环境检查", self.check_environment),
-            ("代码检查", self.run_checks),
-            ("测试执行", self.run_tests),
-            ("包构建", self.build_package),
-            ("包发布", self.publish_package),
-            ("Git标签管理", self.manage_git_tags),
-        ]
+        Args:
+            stages: (阶段名称, 阶段函数, 是否为必需阶段)列表
+
+        Returns:
+            所有阶段是否都成功
+
+        Raises:
+            CICDError: 阶段依赖存在循环
+        """
+        by_key = {stage[1].__name__: stage for stage in stages}
+        # 只保留本次运行中存在的依赖，未参与运行的阶段视为已满足
+        sorter: graphlib.TopologicalSorter[str] = graphlib.TopologicalSorter(
+            {
+                key: self.STAGE_DEPENDENCIES.get(key, set()) & by_key.keys()
+                for key in by_key
+            }
+        )
+        try:
+            sorter.prepare()
+        except graphlib.CycleError as e:
+            raise CICDError(f"阶段依赖存在循环: {', '.join(e.args[1])}") from e
 
+        running: Dict["concurrent.futures.Future[bool]", str] = {}
+        ready: Deque[str] = deque()
+        started: Set[str] = set()
         all_success = True
-        for stage_name, stage_func in stages:
-            self.logger.info(f"开始{stage_name}")
-            if not stage_func():
-                all_success = False
-                self.logger.warning(f"{stage_name}失败")
-            self.logger.info(f"{stage_name}完成")
-
-        print_section("CD流程总结")
-        duration = time.time() - start_time
+        # 线程只等待子进程，数量不受CPU核数限制，每个阶段最多占用一个线程
+        max_workers = 1 if self.config.serial else max(len(stages), 1)
 
-        if all_success:
-            self.logger.info("所有CD步骤通过")
-            print_color("🎉 所有CD步骤通过!", "green")
-            print_color(f"⏱️ 总耗时: {duration:.2f}秒", "blue")
-        else:
-            self.logger.error("部分CD步骤失败")
-            print_color("❌ 部分CD步骤失败!", "red")
-            print_color(f"⏱️ 总耗时: {duration:.2f}秒", "blue")
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers
+            ) as executor:
+                while sorter.is_active():
+                    ready.extend(sorter.get_ready())
+                    while ready and len(running) < max_workers:
+                        key = ready.popleft()
+                        started.add(key)
+                        future = executor.submit(self._run_stage, *by_key[key][:2])
+                        running[future] = key
+
+                    if not running:
+                        break
+
+                    done, _ = concurrent.futures.wait(
+                        running, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    aborted_by: Optional[str] = None
+                    for future in done:
+                        key = running.pop(future)
+                        name, _, required = by_key[key]
+                        success = future.result()
+                        all_success = all_success and success
+                        sorter.done(key)
+                        if not success and required and aborted_by is None:
+                            aborted_by = name
+                    if aborted_by is None:
+                        continue
+
+                    # 等待已在运行的阶段结束，不再提交新的阶段
+                    for future in concurrent.futures.as_completed(running):
+                        all_success = all_success and future.result()
+                    unstarted = [key for key in by_key if key not in started]
+                    self._results.extend(
+                        _StageResult(by_key[key][0], key, "skipped", 0.0)
+                        for key in unstarted
+                    )
+                    skipped = "、".join(by_key[key][0] for key in unstarted)
+                    if skipped:
+                        self.logger.error(
+                            f"必需阶段失败（{aborted_by}），跳过: {skipped}"
+                        )
+                        print_color(f"❌ 必需阶段失败，跳过剩余阶段: {skipped}", "red")
+                    break
+        finally:
+            self._stop_worker()
 
         return all_success
 
-    def run(self) -> bool:
-        """运行完整CI/CD流程"""
-        self.logger.info("开始CI/CD流程")
+    def _resolve_config(self) -> None:
+        """在调度阶段之前确定本次运行的最终配置
+
+        阶段并发执行且缓存摘要依赖配置，因此配置只在这里调整一次，
+        阶段执行期间不再修改：Git未安装时跳过Git相关操作。
+        """
+        if not self.config.skip_git and not self._command_exists("git"):
+            self.config = dataclasses.replace(self.config, skip_git=True)
+
+    def _execute(self, tag: str, label: str) -> bool:
+        """执行带有指定标签的阶段并输出总结
+
+        Args:
+            tag: 阶段标签（"ci"、"cd"或"all"）
+            label: 流程名称，用于日志和总结
+
+        Returns:
+            所有阶段是否都成功
+        """
+        self.logger.info(f"开始{label}流程")
         start_time = time.time()
+        self._results = []
 
-        if self.config.version_bump:
+        if tag != "ci" and self.config.version_bump:
             print_section("版本管理")
-            new_version = self._bump_version(self.config.version_bump)
-            self.current_version = new_version
-
-        stages = [
-            ("环境准备", self.setup_environment),
-            ("依赖安装", self.install_dependencies),
-            ("代码规范检查", self.check_code_format),
-            ("代码格式化", self.format_code),
-            ("类型检查", self.type_check),
-            ("测试执行", self.run_tests),
-            ("测试报告生成", self.generate_test_report),
-            ("安全检查", self.run_security_check),
-            ("环境检查", self.check_environment),
-            ("代码检查", self.run_checks),
-            ("包构建", self.build_package),
-            ("包发布", self.publish_package),
-            ("Git标签管理", self.manage_git_tags),
+            self.current_version = self._bump_version(self.config.version_bump)
+
+        self._resolve_config()
+        stages: List[Stage] = [
+            (name, getattr(self, attr), required)
+            for name, attr, required, tags in self.STAGES
+            if tag in tags
         ]
+        all_success = self._run_stage_graph(stages)
+        self._finalize(start_time, all_success, label)
+        return all_success
 
-        all_success = True
-        for stage_name, stage_func in stages:
-            self.logger.info(f"开始{stage_name}")
-            if not stage_func():
-                all_success = False
-                self.logger.warning(f"{stage_name}失败")
-            self.logger.info(f"{stage_name}完成")
-
-        print_section("CI/CD流程总结")
+    def _finalize(self, start_time: float, all_success: bool, label: str) -> None:
+        """输出流程总结
+
+        各阶段结果合并为一条JSON记录写入日志文件，终端上以一张表格整体输出。
+        """
         duration = time.time() - start_time
+        order = {spec[1]: index for index, spec in enumerate(self.STAGES)}
+        results = sorted(self._results, key=lambda result: order.get(result.key, 0))
+
+        # 失败时以ERROR级别记录，同时触发日志缓冲落盘
+        self.logger.log(
+            logging.INFO if all_success else logging.ERROR,
+            json.dumps(
+                {
+                    "flow": label,
+                    "success": all_success,
+                    "duration": round(duration, 3),
+                    "stages": [
+                        {
+                            "name": result.name,
+                            "stage": result.key,
+                            "status": result.status,
+                            "duration": round(result.duration, 3),
+                        }
+                        for result in results
+                    ],
+                },
+                ensure_ascii=False,
+            ),
+            extra={"structured": True},
+        )
 
+        print_section(f"{label}流程总结")
+        lines = []
+        for result in results:
+            icon, color = _STATUS_STYLES[result.status]
+            lines.append(
+                f"{_COLORS[color]}{icon} {result.duration:>8.2f}秒  {result.name}"
+                f"{_LINE_END}"
+            )
         if all_success:
-            self.logger.info("所有CI/CD步骤通过")
-            print_color("🎉 所有CI/CD步骤通过!", "green")
-            print_color(f"⏱️ 总耗时: {duration:.2f}秒", "blue")
+            color, summary = "green", f"🎉 所有{label}步骤通过!"
         else:
-            self.logger.error("部分CI/CD步骤失败")
-            print_color("❌ 部分CI/CD步骤失败!", "red")
-            print_color(f"⏱️ 总耗时: {duration:.2f}秒", "blue")
+            color, summary = "red", f"❌ 部分{label}步骤失败!"
+        lines.append(f"{_COLORS[color]}{summary}{_LINE_END}")
+        lines.append(f"{_COLORS['blue']}⏱️ 总耗时: {duration:.2f}秒{_LINE_END}")
+        with _OUTPUT_LOCK:
+            sys.stdout.write("".join(lines))
+            sys.stdout.flush()
 
-        return all_success
+    def run_ci(self) -> bool:
+        """运行完整CI流程"""
+        return self._execute("ci", "CI")
+
+    def run_cd(self) -> bool:
+        """运行完整CD流程"""
+        return self._execute("cd", "CD")
+
+    def run(self) -> bool:
+        """运行完整CI/CD流程"""
+        return self._execute("all", "CI/CD")
 
 
 def parse_args() -> argparse.Namespace:
@@ -1109,22 +2007,24 @@ def parse_args() -> argparse.Namespace:
         help="执行模式：ci（仅CI）、cd（仅CD）、all（完整CI/CD）",
     )
 
-    parser.add_argument("--config", type=str, help="配置文件路径")
+    parser.add_argument(
+        "--config", type=str, help="配置文件路径（INI格式，读取[cicd]节）"
+    )
 
     parser.add_argument(
         "--python-version",
         type=str,
-        default=DEFAULT_CONFIG["PYTHON_VERSION"],
-        help="Python版本",
+        help=f"Python版本（默认：{DEFAULT_CONFIG['PYTHON_VERSION']}）",
     )
     parser.add_argument(
-        "--uv-version", type=str, default=DEFAULT_CONFIG["UV_VERSION"], help="uv版本"
+        "--uv-version",
+        type=str,
+        help=f"uv版本（默认：{DEFAULT_CONFIG['UV_VERSION']}）",
     )
     parser.add_argument(
         "--project-dir",
         type=str,
-        default=DEFAULT_CONFIG["PROJECT_DIR"],
-        help="项目目录",
+        help="项目目录（默认：脚本所在目录的上级目录）",
     )
 
     parser.add_argument("--skip-env-prep", action="store_true", help="跳过环境准备")
@@ -1163,6 +2063,45 @@ def parse_args() -> argparse.Namespace:
         "--no-mypy-strict", action="store_true", help="不使用严格的类型检查模式"
     )
 
+    answer_group = parser.add_mutually_exclusive_group()
+    answer_group.add_argument(
+        "--yes",
+        dest="assume_answer",
+        action="store_const",
+        const=True,
+        help="对所有确认提示自动回答是",
+    )
+    answer_group.add_argument(
+        "--no",
+        dest="assume_answer",
+        action="store_const",
+        const=False,
+        help="对所有确认提示自动回答否（CI环境默认）",
+    )
+
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="在常驻工具进程中运行mypy、pytest等Python工具，减少重复启动开销",
+    )
+
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="按顺序逐个执行阶段和命令，不并发运行（便于调试）",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用阶段缓存，始终执行所有阶段",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help=f"阶段缓存目录（默认：项目目录下的{STAMP_DIR}）",
+    )
+
     parser.add_argument(
         "--no-auto-fix",
         action="store_true",
@@ -1188,11 +2127,14 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> int:
-    """主函数"""
-    args = parse_args()
+def create_config(args: argparse.Namespace) -> CICDConfig:
+    """根据命令行参数和配置文件创建CI/CD配置
+
+    优先级：命令行参数 > 配置文件 > DEFAULT_CONFIG
+    """
+    settings = load_config(args.config)
 
-    mypy_strict = args.mypy_strict
+    mypy_strict = args.mypy_strict or settings["MYPY_STRICT"] == "true"
     if args.no_mypy_strict:
         mypy_strict = False
 
@@ -1200,20 +2142,25 @@ def main() -> int:
 
     auto_fix = not args.no_auto_fix
 
-    config = CICDConfig(
-        python_version=args.python_version,
-        uv_version=args.uv_version,
-        project_dir=args.project_dir,
-        test_results_file=DEFAULT_CONFIG["TEST_RESULTS_FILE"],
-        security_report_file=DEFAULT_CONFIG["SECURITY_REPORT_FILE"],
-        uv_index_url=DEFAULT_CONFIG["UV_INDEX_URL"],
-        ruff_output_format=DEFAULT_CONFIG["RUFF_OUTPUT_FORMAT"],
+    # 项目相关路径只解析一次，各阶段直接复用
+    project_dir = Path(args.project_dir or settings["PROJECT_DIR"]).resolve()
+
+    return CICDConfig(
+        python_version=args.python_version or settings["PYTHON_VERSION"],
+        uv_version=args.uv_version or settings["UV_VERSION"],
+        project_dir=project_dir,
+        src_dir=project_dir / "src",
+        log_path=project_dir / "logs" / "cicd.log",
+        test_results_file=settings["TEST_RESULTS_FILE"],
+        security_report_file=settings["SECURITY_REPORT_FILE"],
+        uv_index_url=settings["UV_INDEX_URL"],
+        ruff_output_format=settings["RUFF_OUTPUT_FORMAT"],
         mypy_strict=mypy_strict,
-        pytest_verbose=DEFAULT_CONFIG["PYTEST_VERBOSE"] == "true",
-        pytest_tb_style=DEFAULT_CONFIG["PYTEST_TB_STYLE"],
-        pypi_index_url=DEFAULT_CONFIG["PYPI_INDEX_URL"],
-        test_pypi_index_url=DEFAULT_CONFIG["TEST_PYPI_INDEX_URL"],
-        build_dir=DEFAULT_CONFIG["BUILD_DIR"],
+        pytest_verbose=settings["PYTEST_VERBOSE"] == "true",
+        pytest_tb_style=settings["PYTEST_TB_STYLE"],
+        pypi_index_url=settings["PYPI_INDEX_URL"],
+        test_pypi_index_url=settings["TEST_PYPI_INDEX_URL"],
+        build_dir=settings["BUILD_DIR"],
         log_level=args.log_level,
         config_file=args.config,
         skip_env_prep=args.skip_env_prep,
@@ -1232,14 +2179,27 @@ def main() -> int:
         version_bump=args.version_bump,
         create_git_tag=args.create_git_tag,
         push_git_tag=args.push_git_tag,
-        coverage_enabled=DEFAULT_CONFIG["COVERAGE_ENABLED"] == "true",
-        coverage_threshold=int(DEFAULT_CONFIG["COVERAGE_THRESHOLD"]),
+        coverage_enabled=settings["COVERAGE_ENABLED"] == "true",
+        coverage_threshold=int(settings["COVERAGE_THRESHOLD"]),
         auto_fix=auto_fix,
         skip_nltk=args.skip_nltk,
         pytest_k=args.pytest_k,
         skip_coverage=args.skip_coverage,
+        use_worker=args.worker,
+        serial=args.serial,
+        use_cache=not args.no_cache,
+        cache_dir=project_dir / (args.cache_dir or STAMP_DIR),
+        assume_answer=args.assume_answer,
     )
 
+
+def main() -> int:
+    """主函数"""
+    args = parse_args()
+    config = create_config(args)
+
+    # 切换到项目目录后，子进程无需再指定cwd，可以使用posix_spawn启动
+    os.chdir(config.project_dir)
     cicd = CICD(config)
 
     if args.mode == "ci":
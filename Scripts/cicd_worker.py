@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+ConsensusWeaverAgent CI/CD常驻工具进程
+
+由cicd.py在启用 --worker 时使用项目虚拟环境中的Python（或 `uv run python`）启动一次，
+在同一个解释器中依次执行mypy、pytest以及Python脚本，
+省去每个阶段重新解析uv环境、重新启动解释器和重复导入工具的开销。
+
+通信协议（multiprocessing.connection）：
+- 在命令行参数给出的地址（Unix套接字或Windows命名管道）上监听，
+  使用环境变量 CICD_WORKER_AUTHKEY 中的密钥认证，只接受一个连接
+- 请求：{"tool": ..., "args": [...], "cwd": ..., "env": {...}}
+- 响应：{"returncode": ...}
+- 工具自身的输出直接写到继承的标准输出和标准错误，不经过连接
+- 连接关闭后进程退出
+"""
+
+import importlib
+import os
+import runpy
+import sys
+import traceback
+from multiprocessing.connection import Connection, Listener
+from typing import Any, Callable, Dict, List
+
+AUTHKEY_ENV = "CICD_WORKER_AUTHKEY"
+
+# 开始监听后预先导入的工具模块，使导入与cicd.py的其他阶段重叠进行
+PRELOAD_MODULES = ["mypy.api", "pytest"]
+
+
+def _run_mypy(args: List[str]) -> int:
+    """在当前进程中运行mypy"""
+    from mypy import api
+
+    stdout, stderr, status = api.run(args)
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    return status
+
+
+def _run_pytest(args: List[str]) -> int:
+    """在当前进程中运行pytest"""
+    import pytest
+
+    return int(pytest.main(args))
+
+
+def _run_script(args: List[str]) -> int:
+    """以__main__身份运行Python脚本，args[0]为脚本路径"""
+    sys.argv = list(args)
+    runpy.run_path(args[0], run_name="__main__")
+    return 0
+
+
+TOOLS: Dict[str, Callable[[List[str]], int]] = {
+    "mypy": _run_mypy,
+    "pytest": _run_pytest,
+    "python": _run_script,
+}
+
+
+def _exit_code(code: object) -> int:
+    """将SystemExit.code转换为退出码"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def handle_request(request: Dict[str, Any]) -> int:
+    """执行单个请求并返回退出码
+
+    每个请求结束后恢复工作目录、环境变量、sys.argv和sys.path，
+    保证请求之间互不影响。
+    """
+    tool_name = str(request.get("tool"))
+    tool = TOOLS.get(tool_name)
+    if tool is None:
+        print(f"不支持的工具: {tool_name}", file=sys.stderr)
+        return 127
+
+    args = [str(arg) for arg in request.get("args") or []]
+    cwd = request.get("cwd")
+    env: Dict[str, str] = request.get("env") or {}
+
+    saved_cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    saved_argv = sys.argv
+    saved_path = list(sys.path)
+    try:
+        if cwd:
+            os.chdir(cwd)
+        os.environ.update(env)
+        # 进程内运行的工具不会重新读取PYTHONPATH，这里同步到sys.path
+        pythonpath = env.get("PYTHONPATH", "")
+        sys.path[:0] = [entry for entry in pythonpath.split(os.pathsep) if entry]
+        return tool(args)
+    except SystemExit as e:
+        return _exit_code(e.code)
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+
+
+def preload() -> None:
+    """预先导入工具模块，未安装的模块留到实际使用时再报错"""
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+def serve(conn: Connection) -> None:
+    """逐个接收请求并返回响应，直到连接关闭"""
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if isinstance(request, dict):
+            returncode = handle_request(request)
+        else:
+            print(f"无效的请求: {request!r}", file=sys.stderr)
+            returncode = 2
+        conn.send({"returncode": returncode})
+
+
+def main() -> int:
+    """主函数"""
+    authkey = os.environ.pop(AUTHKEY_ENV, "")
+    if len(sys.argv) != 2 or not authkey:
+        print(f"用法: {AUTHKEY_ENV}=<密钥> cicd_worker.py <监听地址>", file=sys.stderr)
+        return 2
+
+    with Listener(sys.argv[1], authkey=bytes.fromhex(authkey)) as listener:
+        # 先开始监听，cicd.py即可完成连接；请求在导入完成后处理
+        preload()
+        with listener.accept() as conn:
+            serve(conn)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
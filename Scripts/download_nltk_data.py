@@ -1,10 +1,17 @@
 """下载NLTK数据脚本"""
 
+import json
 import os
+import shutil
+import socket
 import sys
+import tempfile
+import threading
 import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 import nltk
+from nltk.downloader import Downloader, ErrorMessage
 
 
 def check_nltk_data_exists(package_name):
@@ -16,57 +23,185 @@ def check_nltk_data_exists(package_name):
         return False
 
 
+# zip校验结果缓存文件名（位于NLTK数据目录下）
+VERIFY_CACHE_FILE = ".verify_cache.json"
+
+
+def _verify_zip(zip_path):
+    """校验单个zip文件，返回是否完好"""
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            return zip_ref.testzip() is None
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError):
+        return False
+
+
 def cleanup_corrupted_zip_files():
-    """清理损坏的zip文件"""
+    """清理损坏的zip文件
+
+    各zip文件并行校验；校验通过的文件按(修改时间, 大小)记录在VERIFY_CACHE_FILE中，
+    之后未变化的文件不再重复校验。
+    """
     nltk_data_dir = nltk.data.path[0]
     if not os.path.exists(nltk_data_dir):
         return
 
-    corrupted_files = []
+    cache_path = os.path.join(nltk_data_dir, VERIFY_CACHE_FILE)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            verified = json.load(f)
+    except (OSError, ValueError):
+        verified = {}
+
+    zip_stats = {}
     for root, dirs, files in os.walk(nltk_data_dir):
         for file in files:
             if file.endswith(".zip"):
                 zip_path = os.path.join(root, file)
                 try:
-                    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                        zip_ref.testzip()
-                except (zipfile.BadZipFile, zipfile.LargeZipFile):
+                    st = os.stat(zip_path)
+                except OSError:
+                    continue
+                zip_stats[zip_path] = [st.st_mtime_ns, st.st_size]
+
+    to_verify = [
+        zip_path
+        for zip_path, stat in zip_stats.items()
+        if verified.get(zip_path) != stat
+    ]
+    corrupted_files = []
+    if to_verify:
+        with ThreadPoolExecutor(max_workers=min(8, len(to_verify))) as executor:
+            for zip_path, ok in zip(to_verify, executor.map(_verify_zip, to_verify)):
+                if not ok:
                     corrupted_files.append(zip_path)
                     print(f"发现损坏的zip文件: {zip_path}")
 
     for corrupted_file in corrupted_files:
+        del zip_stats[corrupted_file]
         try:
-            os.remove(corrupted_file)
+            os.unlink(corrupted_file)
             print(f"已删除损坏的文件: {corrupted_file}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"删除文件失败 {corrupted_file}: {e}")
 
+    if zip_stats != verified:
+        try:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(zip_stats, f)
+        except OSError as e:
+            print(f"写入校验缓存失败 {cache_path}: {e}")
 
-def download_nltk_data_with_mirrors(package_name, mirrors=None):
-    """尝试从多个镜像源下载NLTK数据"""
-    if mirrors is None:
-        mirrors = [
-            None,
-            "https://gitee.com/gislite/nltk_data/raw/",
-            "https://mirror.ghproxy.com/https://raw.githubusercontent.com/nltk/nltk_data/gh-pages/",
-        ]
 
-    for mirror in mirrors:
+DEFAULT_MIRRORS = [
+    None,
+    "https://gitee.com/gislite/nltk_data/raw/",
+    "https://mirror.ghproxy.com/https://raw.githubusercontent.com/nltk/nltk_data/gh-pages/",
+]
+
+# 相邻镜像源之间的启动间隔（秒），让首选源有机会先完成
+MIRROR_STAGGER_SECONDS = 0.5
+
+# 网络连接和单次读取的超时时间（秒），避免停滞的镜像源让下载线程一直阻塞
+MIRROR_TIMEOUT_SECONDS = 30
+
+
+def _merge_tree(src_dir, dst_dir):
+    """将src_dir中的文件移动到dst_dir的对应位置（同一文件系统内，不复制数据）"""
+    for root, _dirs, files in os.walk(src_dir):
+        target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            os.replace(os.path.join(root, file), os.path.join(target_root, file))
+
+
+def _download_from_mirror(package_name, mirror, download_dir, won, merge_lock):
+    """从单个镜像源下载数据包
+
+    每次尝试下载到download_dir下独立的临时目录，只有最先成功的尝试会将结果并入
+    download_dir，同时进行的多个尝试不会写入同一文件。下载过程中每读取约32KB
+    （NLTK下载器每两个数据块报告一次进度）就检查一次won，其他镜像源已经成功时立即停止，不再继续占用带宽。
+    """
+    if won.is_set():
+        return False
+
+    if mirror:
+        print(f"尝试从镜像源下载 {package_name}: {mirror}")
+        downloader = Downloader(server_index_url=mirror + "index.xml")
+    else:
+        downloader = Downloader()
+
+    tmp_dir = tempfile.mkdtemp(prefix=f".{package_name}-", dir=download_dir)
+    try:
+        messages = downloader.incr_download(package_name, tmp_dir)
         try:
-            if mirror:
-                print(f"尝试从镜像源下载 {package_name}: {mirror}")
-                nltk.data.path.insert(0, mirror)
+            for msg in messages:
+                if won.is_set():
+                    return False
+                if isinstance(msg, ErrorMessage):
+                    raise RuntimeError(msg.message)
+        finally:
+            # 提前停止时关闭生成器，释放正在写入的临时文件
+            messages.close()
+        with merge_lock:
+            if won.is_set():
+                return False
+            _merge_tree(tmp_dir, download_dir)
+            won.set()
+        print(f"[OK] 成功下载 {package_name}")
+        return True
+    except Exception as e:
+        print(f"[WARN] 从镜像源下载失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
-            nltk.download(package_name, quiet=True)
-            print(f"[OK] 成功下载 {package_name}")
-            return True
-        except Exception as e:
-            print(f"[WARN] 从镜像源下载失败: {e}")
-            if mirror and mirror in nltk.data.path:
-                nltk.data.path.remove(mirror)
-            continue
 
-    return False
+def download_nltk_data_with_mirrors(package_name, mirrors=None, download_dir=None):
+    """尝试从多个镜像源下载NLTK数据
+
+    各镜像源依次间隔MIRROR_STAGGER_SECONDS启动（前一个尝试失败时立即启动下一个），
+    以最先成功的结果为准，其余尝试在读取下一个数据块前停止。
+    """
+    if mirrors is None:
+        mirrors = DEFAULT_MIRRORS
+    if download_dir is None:
+        download_dir = Downloader().default_download_dir()
+    os.makedirs(download_dir, exist_ok=True)
+
+    won = threading.Event()
+    merge_lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=len(mirrors))
+    futures = []
+    try:
+        for mirror in mirrors:
+            pending = [future for future in futures if not future.done()]
+            if pending:
+                wait(
+                    pending, timeout=MIRROR_STAGGER_SECONDS, return_when=FIRST_COMPLETED
+                )
+            if won.is_set():
+                break
+            futures.append(
+                executor.submit(
+                    _download_from_mirror,
+                    package_name,
+                    mirror,
+                    download_dir,
+                    won,
+                    merge_lock,
+                )
+            )
+
+        for future in as_completed(futures):
+            if future.result():
+                return True
+        return False
+    finally:
+        # 尚未开始的尝试直接取消；已开始的尝试检查到won后停止并自行清理临时目录
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def main():
@@ -80,15 +215,36 @@ def main():
     print("开始下载NLTK数据...")
 
     success_count = 0
+    missing_packages = []
     for package in required_packages:
         if check_nltk_data_exists(package):
             print(f"[OK] {package} 已存在，跳过下载")
             success_count += 1
         else:
-            if download_nltk_data_with_mirrors(package):
-                success_count += 1
-            else:
-                print(f"[FAIL] {package} 下载失败")
+            missing_packages.append(package)
+
+    if missing_packages:
+        download_dir = Downloader().default_download_dir()
+        # NLTK下载器调用urlopen时不指定超时，通过默认超时限制停滞的连接；
+        # 脚本也会在CI worker进程内运行，结束后恢复原来的默认值
+        previous_timeout = socket.getdefaulttimeout()
+        socket.setdefaulttimeout(MIRROR_TIMEOUT_SECONDS)
+        try:
+            # 各数据包写入不同的文件，可以并行下载
+            with ThreadPoolExecutor(max_workers=len(missing_packages)) as executor:
+                results = executor.map(
+                    lambda package: download_nltk_data_with_mirrors(
+                        package, download_dir=download_dir
+                    ),
+                    missing_packages,
+                )
+                for package, ok in zip(missing_packages, results):
+                    if ok:
+                        success_count += 1
+                    else:
+                        print(f"[FAIL] {package} 下载失败")
+        finally:
+            socket.setdefaulttimeout(previous_timeout)
 
     print(f"\n下载完成: {success_count}/{len(required_packages)} 个包成功")
 
@@ -1,6 +1,9 @@
 # 模型下载
+import argparse
 import os
 import shutil
+import subprocess
+import sys
 
 from modelscope.hub.file_download import model_file_download
 
@@ -8,50 +11,143 @@ from modelscope.hub.file_download import model_file_download
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
 
-# 确保下载目录存在
+# 下载目录
 download_dir = os.path.join(project_root, ".models", "qwen")
-os.makedirs(download_dir, exist_ok=True)
 
 # 指定要下载的文件
 model_id = "Qwen/Qwen3-4B-GGUF"
 target_file = "Qwen3-4B-Q5_K_M.gguf"  # 从ModelScope模型页面获取的准确文件名
 
-# 使用model_file_download精确下载单个文件
-print(f"开始下载模型文件 {target_file}...")
-downloaded_path = model_file_download(
-    model_id=model_id, file_path=target_file, revision="master"
-)
-
-print(f"文件已下载至临时位置: {downloaded_path}")
-
-# 将文件移动到指定目录
-target_path = os.path.join(download_dir, target_file)
-print(f"\n将文件移动到目标目录 {target_path}...")
-shutil.copy2(downloaded_path, target_path)
-print("文件已成功移动到目标目录")
-
-# 验证下载结果
-print("\n验证下载结果:")
-
-# 检查下载目录中的文件
-print(f"\n下载目录 {download_dir} 中的文件:")
-dir_files = os.listdir(download_dir)
-for file in dir_files:
-    file_path = os.path.join(download_dir, file)
-    file_size = os.path.getsize(file_path) / (1024 * 1024 * 1024)  # GB
-    print(f"  - {file} ({file_size:.2f} GB)")
-
-    # 检查是否有多余的gguf文件
-    if file.endswith(".gguf") and file != target_file:
-        print(f"    ⚠️  警告: 发现多余的gguf文件 {file}")
-
-# 确认目标文件是否存在且大小合理
-if os.path.exists(target_path):
-    target_size = os.path.getsize(target_path) / (1024 * 1024 * 1024)  # GB
-    print(f"\n✅ 成功: 目标文件 {target_file} 已下载完成")
-    print(f"   大小: {target_size:.2f} GB")
-    print(f"   路径: {target_path}")
-else:
-    print(f"\n❌ 错误: 目标文件 {target_file} 下载失败")
-
-print("\n下载完成！")
+# 完整模型文件约2.9GB，小于该大小视为下载不完整
+MIN_EXPECTED_BYTES = 2 * 1024 * 1024 * 1024
+
+# 设置为1时忽略已存在的模型文件，重新下载
+FORCE_ENV = "QWEN_FORCE_REDOWNLOAD"
+
+
+def link_or_copy(src, dst):
+    """将下载的文件放到目标位置，尽量避免复制数据
+
+    依次尝试：目标已存在且大小一致时直接跳过；硬链接（不移动数据，
+    ModelScope缓存中的文件仍然有效）；重命名；支持reflink的文件系统上的写时复制；
+    最后才完整复制。
+
+    Returns:
+        实际采用的方式
+    """
+    if os.path.exists(dst) and os.path.getsize(dst) == os.path.getsize(src):
+        return "已存在，跳过"
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    try:
+        os.link(src, dst)
+        return "硬链接"
+    except OSError:
+        pass
+    try:
+        os.replace(src, dst)
+        return "移动"
+    except OSError:
+        pass
+    cp = shutil.which("cp")
+    if cp is not None and os.name != "nt":
+        result = subprocess.run(
+            [cp, "--reflink=auto", "--preserve=timestamps", src, dst],
+            capture_output=True,
+        )
+        if result.returncode == 0:
+            return "写时复制"
+    shutil.copy2(src, dst)
+    return "复制"
+
+
+def is_model_present(target_path):
+    """目标文件是否已存在且大小合理"""
+    try:
+        return os.path.getsize(target_path) >= MIN_EXPECTED_BYTES
+    except OSError:
+        return False
+
+
+def verify_download_dir():
+    """列出下载目录中的文件，并对多余的gguf文件给出警告"""
+    print("\n验证下载结果:")
+
+    # 检查下载目录中的文件
+    print(f"\n下载目录 {download_dir} 中的文件:")
+    with os.scandir(download_dir) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        file = entry.name
+        file_size = entry.stat().st_size / (1024 * 1024 * 1024)  # GB
+        print(f"  - {file} ({file_size:.2f} GB)")
+
+        # 检查是否有多余的gguf文件
+        if file.endswith(".gguf") and file != target_file:
+            print(f"    ⚠️  警告: 发现多余的gguf文件 {file}")
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description=f"下载{target_file}模型文件")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=f"忽略已存在的模型文件重新下载（也可设置环境变量{FORCE_ENV}=1）",
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="列出下载目录中的文件并检查多余的gguf文件"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    force = args.force or os.environ.get(FORCE_ENV) == "1"
+    target_path = os.path.join(download_dir, target_file)
+
+    if not force and is_model_present(target_path):
+        print(f"✅ 模型文件已存在，跳过下载: {target_path}")
+        if args.verify:
+            verify_download_dir()
+        return 0
+
+    # 确保下载目录存在
+    os.makedirs(download_dir, exist_ok=True)
+
+    # 使用model_file_download精确下载单个文件
+    print(f"开始下载模型文件 {target_file}...")
+    downloaded_path = model_file_download(
+        model_id=model_id, file_path=target_file, revision="master"
+    )
+
+    print(f"文件已下载至临时位置: {downloaded_path}")
+
+    # 将文件移动到指定目录
+    print(f"\n将文件移动到目标目录 {target_path}...")
+    method = link_or_copy(downloaded_path, target_path)
+    print(f"文件已成功移动到目标目录（{method}）")
+
+    if args.verify:
+        verify_download_dir()
+
+    # 确认目标文件是否存在且大小合理
+    if os.path.exists(target_path):
+        target_size = os.path.getsize(target_path) / (1024 * 1024 * 1024)  # GB
+        print(f"\n✅ 成功: 目标文件 {target_file} 已下载完成")
+        print(f"   大小: {target_size:.2f} GB")
+        print(f"   路径: {target_path}")
+    else:
+        print(f"\n❌ 错误: 目标文件 {target_file} 下载失败")
+        return 1
+
+    print("\n下载完成！")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
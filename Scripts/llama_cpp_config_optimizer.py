@@ -1,13 +1,99 @@
+import argparse
+import functools
 import json
 import os
 import platform
 import re
 import subprocess
-from dataclasses import dataclass
+import sys
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, FrozenSet, List, Optional
+
+# 硬件检测结果缓存：硬件在两次运行之间几乎不会变化，缓存命中时跳过所有检测子进程
+HARDWARE_CACHE_TTL = 24 * 60 * 60
+HARDWARE_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "llama_cpp_optimizer",
+    "hw.json",
+)
+
+# 运行期间不会变化，导入时读取一次
+_SYSTEM = platform.system()
+_MACHINE = platform.machine()
+
+# /proc/cpuinfo解析：只读取第一个处理器的记录，每个正则只在字节串上执行一次
+# 每次读取一页：内核只为能放进缓冲区的处理器生成记录，单条记录通常不到4KB
+_CPUINFO_READ_SIZE = 4096
+_MODEL_RE = re.compile(rb"model name\s*:\s*(.+)")
+_FLAGS_RE = re.compile(rb"flags\s*:\s*(.+)")
+_FREQ_RE = re.compile(rb"cpu MHz\s*:\s*([\d.]+)")
+_SYS_CPU_DIR = "/sys/devices/system/cpu"
+_DRM_DIR = "/sys/class/drm"
+_DRM_CARD_RE = re.compile(r"card\d+$")
+
+
+def _read_sys_value(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
 
-import yaml
+
+def _linux_cpu_counts() -> tuple:
+    """当前进程可用的物理核心数和逻辑线程数
+
+    逻辑线程取自CPU亲和性掩码，在容器和taskset限制下也是正确的。
+    物理核心按sysfs拓扑中(physical_package_id, core_id)去重统计，
+    拓扑不可用时根据smt/active估算。
+
+    Returns:
+        (物理核心数, 逻辑线程数)
+    """
+    allowed = sorted(os.sched_getaffinity(0))
+    threads = len(allowed)
+
+    physical = set()
+    for cpu in allowed:
+        topology = os.path.join(_SYS_CPU_DIR, f"cpu{cpu}", "topology")
+        core_id = _read_sys_value(os.path.join(topology, "core_id"))
+        if core_id is None:
+            physical.clear()
+            break
+        package_id = _read_sys_value(os.path.join(topology, "physical_package_id"))
+        physical.add((package_id, core_id))
+
+    if physical:
+        return len(physical), threads
+    # 没有拓扑信息时参考smt/active：超线程开启时按每核心2个线程估算
+    if _read_sys_value(os.path.join(_SYS_CPU_DIR, "smt", "active")) == "1":
+        return max(1, threads // 2), threads
+    return threads, threads
+
+
+def _read_proc_file(path: str, stop: Optional[bytes] = None) -> bytes:
+    """分块读取/proc文件，读到stop标记后即停止，只返回标记之前的内容
+
+    /proc/cpuinfo的内容由内核在读取时逐个处理器生成，在核心很多的机器上
+    读完整个文件开销很大；所有处理器的型号和指令集相同，读到第一条记录的
+    结尾（空行）就足够了。
+    """
+    data = bytearray()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        while chunk := os.read(fd, _CPUINFO_READ_SIZE):
+            # 只在新读入的部分（加上可能跨块的标记前缀）中查找
+            start = max(0, len(data) - len(stop) + 1) if stop else 0
+            data += chunk
+            end = data.find(stop, start) if stop else -1
+            if end >= 0:
+                return bytes(data[:end])
+    finally:
+        os.close(fd)
+    return bytes(data)
 
 
 class OS(Enum):
@@ -24,7 +110,7 @@ class GPUVendor(Enum):
     UNKNOWN = "Unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class CPUInfo:
     model: str
     cores: int
@@ -34,16 +120,20 @@ class CPUInfo:
     features: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class GPUInfo:
     vendor: GPUVendor
     model: str
     vram_gb: float
     compute_capability: Optional[str] = None
     is_dedicated: bool = True
+    # 多卡信息：vram_gb为第一张卡的显存，device_vram_gb为每张卡的显存
+    count: int = 1
+    has_nvlink: bool = False
+    device_vram_gb: List[float] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryInfo:
     total_gb: float
     available_gb: float
@@ -51,15 +141,26 @@ class MemoryInfo:
     speed_mhz: Optional[float] = None
 
 
-@dataclass
+# 硬件信息中可以单独检测的部分
+HARDWARE_PARTS = frozenset({"cpu", "gpu", "memory"})
+
+
+@dataclass(slots=True)
 class HardwareInfo:
+    """硬件信息
+
+    probed为已检测的部分。detect_partial未检测的部分为None且不在probed中，
+    此时gpu为None不代表没有GPU；只有gpu在probed中时，gpu为None才表示没有GPU。
+    """
+
     os: OS
-    cpu: CPUInfo
-    gpu: Optional[GPUInfo]
-    memory: MemoryInfo
+    cpu: Optional[CPUInfo] = None
+    gpu: Optional[GPUInfo] = None
+    memory: Optional[MemoryInfo] = None
+    probed: FrozenSet[str] = HARDWARE_PARTS
 
 
-@dataclass
+@dataclass(slots=True)
 class LlamaCppConfig:
     n_threads: int
     n_batch: int
@@ -70,9 +171,10 @@ class LlamaCppConfig:
     use_mlock: bool
     low_vram: bool
     split_mode: Optional[str] = None
+    tensor_split: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ConfigRecommendation:
     config: LlamaCppConfig
     reasoning: List[str]
@@ -80,7 +182,19 @@ class ConfigRecommendation:
     command_template: str
 
 
-@dataclass
+@dataclass(slots=True)
+class Tier:
+    """配置档位：资源量不低于min_gb时采用的取值，None表示该档位不决定此项"""
+
+    min_gb: float
+    label: str
+    n_batch: Optional[int] = None
+    n_ctx: Optional[int] = None
+    n_gpu_layers: Optional[int] = None
+    quantization: Optional[str] = None
+
+
+@dataclass(slots=True)
 class ConfigValidation:
     is_valid: bool
     issues: List[str]
@@ -88,14 +202,289 @@ class ConfigValidation:
     suggestions: List[str]
 
 
+# IsProcessorFeaturePresent的特性编号（winnt.h中的PF_*常量）
+_WINDOWS_CPU_FEATURES = (
+    ("AVX", 39),  # PF_AVX_INSTRUCTIONS_AVAILABLE
+    ("AVX2", 40),  # PF_AVX2_INSTRUCTIONS_AVAILABLE
+    ("AVX512", 41),  # PF_AVX512F_INSTRUCTIONS_AVAILABLE
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _windows_cpu_features() -> tuple:
+    """在进程内查询Windows上的CPU指令集特性
+
+    IsProcessorFeaturePresent由内核根据CPUID结果（并考虑操作系统是否启用了
+    AVX状态保存）给出，无需启动wmic进程。结果在进程内缓存。
+    """
+    import ctypes
+
+    try:
+        is_present = ctypes.windll.kernel32.IsProcessorFeaturePresent
+    except (AttributeError, OSError):
+        return ()
+    return tuple(name for name, feature in _WINDOWS_CPU_FEATURES if is_present(feature))
+
+
+@functools.lru_cache(maxsize=1)
+def _libc() -> Any:
+    import ctypes
+    import ctypes.util
+
+    return ctypes.CDLL(ctypes.util.find_library("c") or "libc.dylib", use_errno=True)
+
+
+def _sysctl_raw(name: str) -> Optional[bytes]:
+    """通过sysctlbyname在进程内读取sysctl值，不存在时返回None"""
+    import ctypes
+
+    libc = _libc()
+    key = name.encode()
+    size = ctypes.c_size_t(0)
+    if libc.sysctlbyname(key, None, ctypes.byref(size), None, 0) != 0:
+        return None
+    buf = ctypes.create_string_buffer(size.value)
+    if libc.sysctlbyname(key, buf, ctypes.byref(size), None, 0) != 0:
+        return None
+    return buf.raw[: size.value]
+
+
+def _sysctl_str(name: str) -> str:
+    raw = _sysctl_raw(name)
+    return raw.rstrip(b"\0").decode(errors="replace").strip() if raw else ""
+
+
+def _sysctl_u64(name: str) -> int:
+    """读取整数类型的sysctl值（按长度兼容32位和64位），不存在时返回0"""
+    raw = _sysctl_raw(name)
+    if not raw or len(raw) not in (4, 8):
+        return 0
+    return int.from_bytes(raw, sys.byteorder)
+
+
+# PCI厂商ID到显卡厂商的映射
+_PCI_GPU_VENDORS = {
+    "0x10de": GPUVendor.NVIDIA,
+    "0x1002": GPUVendor.AMD,
+    "0x8086": GPUVendor.INTEL,
+}
+
+# 显卡名称中的关键字到厂商的映射，按顺序匹配第一个出现的关键字
+_GPU_VENDOR_TOKENS = {
+    "nvidia": GPUVendor.NVIDIA,
+    "geforce": GPUVendor.NVIDIA,
+    "rtx": GPUVendor.NVIDIA,
+    "quadro": GPUVendor.NVIDIA,
+    "tesla": GPUVendor.NVIDIA,
+    "amd": GPUVendor.AMD,
+    "radeon": GPUVendor.AMD,
+    "rx ": GPUVendor.AMD,
+    "intel": GPUVendor.INTEL,
+    "arc ": GPUVendor.INTEL,
+    "iris": GPUVendor.INTEL,
+    "apple": GPUVendor.APPLE,
+    " m1": GPUVendor.APPLE,
+    " m2": GPUVendor.APPLE,
+    " m3": GPUVendor.APPLE,
+}
+
+# SMBIOS内存设备（类型17）中的内存类型编号
+_SMBIOS_MEMORY_TYPES = {
+    0x12: "DDR",
+    0x13: "DDR2",
+    0x18: "DDR3",
+    0x1A: "DDR4",
+    0x1B: "LPDDR",
+    0x1C: "LPDDR2",
+    0x1D: "LPDDR3",
+    0x1E: "LPDDR4",
+    0x22: "DDR5",
+    0x23: "LPDDR5",
+}
+_SMBIOS_ENTRIES_DIR = "/sys/firmware/dmi/entries"
+
+
+def _read_smbios_memory_device() -> Optional[tuple]:
+    """从sysfs中的SMBIOS类型17记录读取第一条已安装内存的类型和频率
+
+    内核在/sys/firmware/dmi/entries下导出了与dmidecode相同的原始记录，
+    直接解析即可，无需启动dmidecode进程。这些文件通常只有root可读，
+    目录不存在时返回None。
+
+    Returns:
+        (内存类型, 频率MHz)，字段无法识别时为None
+    """
+    try:
+        with os.scandir(_SMBIOS_ENTRIES_DIR) as it:
+            names = sorted(entry.name for entry in it if entry.name.startswith("17-"))
+    except FileNotFoundError:
+        return None
+
+    for name in names:
+        with open(os.path.join(_SMBIOS_ENTRIES_DIR, name, "raw"), "rb") as f:
+            raw = f.read()
+        # SMBIOS 2.3起的格式：0x0C容量（0表示空插槽）、0x12类型、0x15频率
+        if len(raw) < 0x17 or raw[1] < 0x17:
+            continue
+        if int.from_bytes(raw[0x0C:0x0E], "little") == 0:
+            continue
+        memory_type = _SMBIOS_MEMORY_TYPES.get(raw[0x12])
+        speed = int.from_bytes(raw[0x15:0x17], "little")
+        return memory_type, float(speed) if speed else None
+    return None
+
+
+def _nvml_has_nvlink(pynvml: Any, handle: Any) -> bool:
+    """显卡是否有已启用的NVLink链路，不支持NVLink的显卡查询时会抛出NVMLError"""
+    for link in range(pynvml.NVML_NVLINK_MAX_LINKS):
+        try:
+            state = pynvml.nvmlDeviceGetNvLinkState(handle, link)
+        except pynvml.NVMLError:
+            return False
+        if state == pynvml.NVML_FEATURE_ENABLED:
+            return True
+    return False
+
+
+def _boot_time() -> Optional[float]:
+    try:
+        import psutil
+
+        return float(psutil.boot_time())
+    except Exception:
+        return None
+
+
+def _hardware_to_dict(hardware: HardwareInfo) -> Dict[str, Any]:
+    data = asdict(hardware)
+    data["os"] = hardware.os.value
+    # 只缓存完整的检测结果，probed恒为全部
+    del data["probed"]
+    if hardware.gpu is not None:
+        data["gpu"]["vendor"] = hardware.gpu.vendor.value
+    return data
+
+
+def _hardware_from_dict(data: Dict[str, Any]) -> HardwareInfo:
+    gpu_data = data.get("gpu")
+    gpu = None
+    if gpu_data:
+        gpu = GPUInfo(**{**gpu_data, "vendor": GPUVendor(gpu_data["vendor"])})
+    return HardwareInfo(
+        os=OS(data["os"]),
+        cpu=CPUInfo(**data["cpu"]),
+        gpu=gpu,
+        memory=MemoryInfo(**data["memory"]),
+    )
+
+
 class HardwareDetector:
-    def __init__(self):
+    def __init__(
+        self,
+        cache_ttl: Optional[float] = HARDWARE_CACHE_TTL,
+        cache_path: str = HARDWARE_CACHE_PATH,
+        verbose: bool = True,
+    ):
+        """
+        Args:
+            cache_ttl: 硬件检测结果缓存的有效期（秒），为None时不使用缓存
+            cache_path: 缓存文件路径
+            verbose: 是否输出检测过程。输出先缓存，在detect_all结束时一次写出
+        """
+        self.verbose = verbose
+        self._log_buf: List[str] = []
+        self.cache_ttl = cache_ttl
+        self.cache_path = cache_path
         self.os = self._detect_os()
-        print(f"检测到操作系统: {self.os.value}")
-        print("-" * 80)
+        self._log(f"检测到操作系统: {self.os.value}")
+        self._log("-" * 80)
+
+    def _log(self, *args: Any) -> None:
+        if self.verbose:
+            self._log_buf.append(" ".join(str(arg) for arg in args))
+
+    def flush_log(self) -> None:
+        """一次性写出缓存的检测过程输出"""
+        if self._log_buf:
+            sys.stdout.write("\n".join(self._log_buf) + "\n")
+            sys.stdout.flush()
+            self._log_buf.clear()
+
+    @functools.cached_property
+    def cpu(self) -> CPUInfo:
+        """CPU信息，首次访问时检测，之后直接返回结果"""
+        return self.detect_cpu()
+
+    @functools.cached_property
+    def gpu(self) -> Optional[GPUInfo]:
+        """GPU信息，首次访问时检测，之后直接返回结果"""
+        return self.detect_gpu()
+
+    @functools.cached_property
+    def memory(self) -> MemoryInfo:
+        """内存信息，首次访问时检测，之后直接返回结果"""
+        return self.detect_memory()
+
+    @functools.cached_property
+    def _wmi(self) -> Any:
+        """Windows上共享的WMI连接，只在首次使用时建立"""
+        import wmi
+
+        return wmi.WMI()
+
+    def _fingerprint(self) -> Dict[str, Any]:
+        """主机指纹：主机名、架构、系统以及开机时间，重启后缓存失效"""
+        return {
+            "node": platform.node(),
+            "machine": _MACHINE,
+            "system": _SYSTEM,
+            "boot_time": _boot_time(),
+        }
+
+    def _load_cached(self) -> Optional[HardwareInfo]:
+        if self.cache_ttl is None:
+            return None
+        try:
+            if time.time() - os.path.getmtime(self.cache_path) > self.cache_ttl:
+                return None
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("fingerprint") != self._fingerprint():
+                return None
+            hardware = _hardware_from_dict(cached["hardware"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        # 可用内存随时变化，不使用缓存值
+        try:
+            import psutil
+
+            hardware.memory.available_gb = psutil.virtual_memory().available / (1024**3)
+        except Exception:
+            pass
+        return hardware
+
+    def _save_cached(self, hardware: HardwareInfo) -> None:
+        if self.cache_ttl is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "fingerprint": self._fingerprint(),
+                        "hardware": _hardware_to_dict(hardware),
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self._log(f"写入硬件信息缓存失败: {e}")
 
     def _detect_os(self) -> OS:
-        system = platform.system()
+        system = _SYSTEM
         if system == "Windows":
             return OS.WINDOWS
         elif system == "Darwin":
@@ -106,7 +495,7 @@ class HardwareDetector:
             raise ValueError(f"不支持的操作系统: {system}")
 
     def detect_cpu(self) -> CPUInfo:
-        print("正在检测CPU信息...")
+        self._log("正在检测CPU信息...")
         try:
             if self.os == OS.WINDOWS:
                 return self._detect_cpu_windows()
@@ -115,7 +504,7 @@ class HardwareDetector:
             elif self.os == OS.MACOS:
                 return self._detect_cpu_macos()
         except Exception as e:
-            print(f"CPU检测失败: {e}")
+            self._log(f"CPU检测失败: {e}")
             return CPUInfo(
                 model="Unknown",
                 cores=4,
@@ -126,10 +515,10 @@ class HardwareDetector:
             )
 
     def _detect_cpu_windows(self) -> CPUInfo:
-        import wmi
-
-        c = wmi.WMI()
-        cpu_info = c.Win32_Processor()[0]
+        cpu_info = self._wmi.query(
+            "SELECT Name, NumberOfCores, NumberOfLogicalProcessors, MaxClockSpeed "
+            "FROM Win32_Processor"
+        )[0]
 
         model = cpu_info.Name
         model = model.replace("(R)", "").replace("(TM)", "").strip()
@@ -137,34 +526,17 @@ class HardwareDetector:
         threads = cpu_info.NumberOfLogicalProcessors
         frequency_ghz = cpu_info.MaxClockSpeed / 1000.0
 
-        features = []
-        try:
-            result = subprocess.run(
-                ["wmic", "cpu", "get", "Capabilities", "/value"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                capabilities = result.stdout
-                if "AVX" in capabilities:
-                    features.append("AVX")
-                if "AVX2" in capabilities:
-                    features.append("AVX2")
-                if "AVX512" in capabilities:
-                    features.append("AVX512")
-        except Exception:
-            pass
+        features = list(_windows_cpu_features())
 
-        architecture = platform.machine()
+        architecture = _MACHINE
 
-        print(f"  CPU型号: {model}")
-        print(f"  物理核心: {cores}")
-        print(f"  逻辑线程: {threads}")
-        print(f"  主频: {frequency_ghz:.2f} GHz")
-        print(f"  架构: {architecture}")
+        self._log(f"  CPU型号: {model}")
+        self._log(f"  物理核心: {cores}")
+        self._log(f"  逻辑线程: {threads}")
+        self._log(f"  主频: {frequency_ghz:.2f} GHz")
+        self._log(f"  架构: {architecture}")
         if features:
-            print(f"  特性: {', '.join(features)}")
+            self._log(f"  特性: {', '.join(features)}")
 
         return CPUInfo(
             model=model,
@@ -182,42 +554,47 @@ class HardwareDetector:
         frequency_ghz = 0.0
         features = []
 
+        cores, threads = _linux_cpu_counts()
+
         try:
-            with open("/proc/cpuinfo", "r") as f:
-                cpuinfo = f.read()
+            cpuinfo = _read_proc_file("/proc/cpuinfo", stop=b"\n\n")
 
-            model_match = re.search(r"model name\s*:\s*(.+)", cpuinfo)
+            model_match = _MODEL_RE.search(cpuinfo)
             if model_match:
-                model = model_match.group(1).strip()
-
-            cores = len(re.findall(r"processor\s*:", cpuinfo))
-            threads = cores
+                model = model_match.group(1).decode(errors="replace").strip()
 
-            freq_match = re.search(r"cpu MHz\s*:\s*([\d.]+)", cpuinfo)
-            if freq_match:
+            # 优先使用cpufreq的最大频率，cpu MHz只是读取时的瞬时频率
+            max_freq_khz = _read_sys_value(
+                os.path.join(_SYS_CPU_DIR, "cpu0", "cpufreq", "cpuinfo_max_freq")
+            )
+            freq_match = _FREQ_RE.search(cpuinfo)
+            if max_freq_khz:
+                frequency_ghz = int(max_freq_khz) / 1_000_000.0
+            elif freq_match:
                 frequency_ghz = float(freq_match.group(1)) / 1000.0
 
-            flags_match = re.search(r"flags\s*:\s*(.+)", cpuinfo)
+            flags_match = _FLAGS_RE.search(cpuinfo)
             if flags_match:
-                flags = flags_match.group(1)
-                if "avx" in flags:
+                flags = frozenset(flags_match.group(1).split())
+                if b"avx" in flags:
                     features.append("AVX")
-                if "avx2" in flags:
+                if b"avx2" in flags:
                     features.append("AVX2")
-                if "avx512f" in flags:
+                if b"avx512f" in flags:
                     features.append("AVX512")
 
         except Exception as e:
-            print(f"  读取/proc/cpuinfo失败: {e}")
+            self._log(f"  读取/proc/cpuinfo失败: {e}")
 
-        architecture = platform.machine()
+        architecture = _MACHINE
 
-        print(f"  CPU型号: {model}")
-        print(f"  逻辑线程: {threads}")
-        print(f"  主频: {frequency_ghz:.2f} GHz")
-        print(f"  架构: {architecture}")
+        self._log(f"  CPU型号: {model}")
+        self._log(f"  物理核心: {cores}")
+        self._log(f"  逻辑线程: {threads}")
+        self._log(f"  主频: {frequency_ghz:.2f} GHz")
+        self._log(f"  架构: {architecture}")
         if features:
-            print(f"  特性: {', '.join(features)}")
+            self._log(f"  特性: {', '.join(features)}")
 
         return CPUInfo(
             model=model,
@@ -236,56 +613,26 @@ class HardwareDetector:
         features = []
 
         try:
-            result = subprocess.run(
-                ["sysctl", "-n", "machdep.cpu.brand_string"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                model = result.stdout.strip()
-
-            result = subprocess.run(
-                ["sysctl", "-n", "hw.physicalcpu"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                cores = int(result.stdout.strip())
-
-            result = subprocess.run(
-                ["sysctl", "-n", "hw.logicalcpu"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                threads = int(result.stdout.strip())
-
-            result = subprocess.run(
-                ["sysctl", "-n", "hw.cpufrequency"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                frequency_ghz = float(result.stdout.strip()) / 1_000_000_000.0
+            model = _sysctl_str("machdep.cpu.brand_string") or model
+            cores = _sysctl_u64("hw.physicalcpu")
+            threads = _sysctl_u64("hw.logicalcpu")
+            # Apple Silicon上没有hw.cpufrequency，保持为0
+            frequency_ghz = _sysctl_u64("hw.cpufrequency") / 1_000_000_000.0
 
             features.append("NEON")
 
         except Exception as e:
-            print(f"  macOS CPU检测失败: {e}")
+            self._log(f"  macOS CPU检测失败: {e}")
 
-        architecture = platform.machine()
+        architecture = _MACHINE
 
-        print(f"  CPU型号: {model}")
-        print(f"  物理核心: {cores}")
-        print(f"  逻辑线程: {threads}")
-        print(f"  主频: {frequency_ghz:.2f} GHz")
-        print(f"  架构: {architecture}")
+        self._log(f"  CPU型号: {model}")
+        self._log(f"  物理核心: {cores}")
+        self._log(f"  逻辑线程: {threads}")
+        self._log(f"  主频: {frequency_ghz:.2f} GHz")
+        self._log(f"  架构: {architecture}")
         if features:
-            print(f"  特性: {', '.join(features)}")
+            self._log(f"  特性: {', '.join(features)}")
 
         return CPUInfo(
             model=model,
@@ -297,7 +644,7 @@ class HardwareDetector:
         )
 
     def detect_gpu(self) -> Optional[GPUInfo]:
-        print("\n正在检测GPU信息...")
+        self._log("\n正在检测GPU信息...")
         try:
             if self.os == OS.WINDOWS:
                 return self._detect_gpu_windows()
@@ -306,16 +653,14 @@ class HardwareDetector:
             elif self.os == OS.MACOS:
                 return self._detect_gpu_macos()
         except Exception as e:
-            print(f"GPU检测失败: {e}")
+            self._log(f"GPU检测失败: {e}")
             return None
 
     def _detect_gpu_windows(self) -> Optional[GPUInfo]:
-        import wmi
-
-        c = wmi.WMI()
-
         gpus = []
-        for gpu in c.Win32_VideoController():
+        for gpu in self._wmi.query(
+            "SELECT Name, AdapterRAM FROM Win32_VideoController"
+        ):
             if gpu.Name and "Microsoft Basic Display Adapter" not in gpu.Name:
                 vendor = self._detect_gpu_vendor(gpu.Name)
                 vram_gb = gpu.AdapterRAM / (1024**3) if gpu.AdapterRAM else 0.0
@@ -330,16 +675,105 @@ class HardwareDetector:
 
         if gpus:
             gpu = gpus[0]
-            print(f"  GPU型号: {gpu.model}")
-            print(f"  厂商: {gpu.vendor.value}")
-            print(f"  显存: {gpu.vram_gb:.1f} GB")
-            print(f"  类型: {'独立显卡' if gpu.is_dedicated else '集成显卡'}")
+            self._log(f"  GPU型号: {gpu.model}")
+            self._log(f"  厂商: {gpu.vendor.value}")
+            self._log(f"  显存: {gpu.vram_gb:.1f} GB")
+            self._log(f"  类型: {'独立显卡' if gpu.is_dedicated else '集成显卡'}")
             return gpu
 
-        print("  未检测到独立GPU")
+        self._log("  未检测到独立GPU")
+        return None
+
+    def _log_gpu(self, gpu: GPUInfo) -> None:
+        self._log(f"  GPU型号: {gpu.model}")
+        self._log(f"  厂商: {gpu.vendor.value}")
+        self._log(f"  显存: {gpu.vram_gb:.1f} GB")
+        self._log(f"  类型: {'独立显卡' if gpu.is_dedicated else '集成显卡'}")
+        if gpu.count > 1:
+            self._log(
+                f"  数量: {gpu.count}（NVLink: {'是' if gpu.has_nvlink else '否'}）"
+            )
+
+    def _detect_gpu_nvml(self) -> Optional[GPUInfo]:
+        """通过NVML直接查询NVIDIA显卡，未安装pynvml或没有NVIDIA驱动时返回None"""
+        try:
+            import pynvml
+        except ImportError:
+            return None
+
+        try:
+            pynvml.nvmlInit()
+        except pynvml.NVMLError:
+            return None
+        try:
+            count = pynvml.nvmlDeviceGetCount()
+            if count == 0:
+                return None
+            handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(count)]
+            handle = handles[0]
+            name = pynvml.nvmlDeviceGetName(handle)
+            if isinstance(name, bytes):
+                name = name.decode()
+            device_vram_gb = [
+                pynvml.nvmlDeviceGetMemoryInfo(h).total / (1024**3) for h in handles
+            ]
+            major, minor = pynvml.nvmlDeviceGetCudaComputeCapability(handle)
+            return GPUInfo(
+                vendor=GPUVendor.NVIDIA,
+                model=name,
+                vram_gb=device_vram_gb[0],
+                compute_capability=f"{major}.{minor}",
+                count=count,
+                has_nvlink=count > 1 and _nvml_has_nvlink(pynvml, handle),
+                device_vram_gb=device_vram_gb,
+            )
+        finally:
+            pynvml.nvmlShutdown()
+
+    def _detect_gpu_sysfs(self) -> Optional[GPUInfo]:
+        """从/sys/class/drm读取显卡厂商和显存
+
+        只有amdgpu驱动导出mem_info_vram_total，其他厂商在sysfs中拿不到显存，
+        返回None交给后续方式处理。
+        """
+        try:
+            with os.scandir(_DRM_DIR) as it:
+                cards = sorted(
+                    entry.name for entry in it if _DRM_CARD_RE.match(entry.name)
+                )
+        except FileNotFoundError:
+            return None
+
+        for card in cards:
+            device = os.path.join(_DRM_DIR, card, "device")
+            vendor = _PCI_GPU_VENDORS.get(
+                _read_sys_value(os.path.join(device, "vendor")) or ""
+            )
+            vram = _read_sys_value(os.path.join(device, "mem_info_vram_total"))
+            if vendor is None or not vram:
+                continue
+            device_id = _read_sys_value(os.path.join(device, "device"))
+            vram_gb = int(vram) / (1024**3)
+            return GPUInfo(
+                vendor=vendor,
+                model=f"{vendor.value} GPU [{device_id}]",
+                vram_gb=vram_gb,
+                is_dedicated=vram_gb > 1.0,
+            )
         return None
 
     def _detect_gpu_linux(self) -> Optional[GPUInfo]:
+        # 依次尝试NVML和sysfs，都无法确定显存时才调用lspci
+        for probe in (self._detect_gpu_nvml, self._detect_gpu_sysfs):
+            try:
+                gpu = probe()
+            except Exception as e:
+                self._log(f"  Linux GPU检测失败: {e}")
+                continue
+            if gpu is not None:
+                self._log_gpu(gpu)
+                return gpu
+
         try:
             result = subprocess.run(
                 ["lspci", "-nn"], capture_output=True, text=True, timeout=10
@@ -353,10 +787,10 @@ class HardwareDetector:
                 if nvidia_match:
                     model = nvidia_match.group(1)
                     vram_gb = int(nvidia_match.group(2)) / 1024.0
-                    print(f"  GPU型号: {model}")
-                    print("  厂商: NVIDIA")
-                    print(f"  显存: {vram_gb:.1f} GB")
-                    print("  类型: 独立显卡")
+                    self._log(f"  GPU型号: {model}")
+                    self._log("  厂商: NVIDIA")
+                    self._log(f"  显存: {vram_gb:.1f} GB")
+                    self._log("  类型: 独立显卡")
                     return GPUInfo(
                         vendor=GPUVendor.NVIDIA, model=model, vram_gb=vram_gb
                     )
@@ -367,16 +801,16 @@ class HardwareDetector:
                 if amd_match:
                     model = amd_match.group(1)
                     vram_gb = int(amd_match.group(2)) / 1024.0
-                    print(f"  GPU型号: {model}")
-                    print("  厂商: AMD")
-                    print(f"  显存: {vram_gb:.1f} GB")
-                    print("  类型: 独立显卡")
+                    self._log(f"  GPU型号: {model}")
+                    self._log("  厂商: AMD")
+                    self._log(f"  显存: {vram_gb:.1f} GB")
+                    self._log("  类型: 独立显卡")
                     return GPUInfo(vendor=GPUVendor.AMD, model=model, vram_gb=vram_gb)
 
         except Exception as e:
-            print(f"  Linux GPU检测失败: {e}")
+            self._log(f"  Linux GPU检测失败: {e}")
 
-        print("  未检测到独立GPU")
+        self._log("  未检测到独立GPU")
         return None
 
     def _detect_gpu_macos(self) -> Optional[GPUInfo]:
@@ -395,10 +829,10 @@ class HardwareDetector:
                     vram_mb = gpu_data.get("sppci_vram_mb", 0)
                     vram_gb = vram_mb / 1024.0
 
-                    print(f"  GPU型号: {model}")
-                    print("  厂商: Apple")
-                    print(f"  显存: {vram_gb:.1f} GB")
-                    print(f"  类型: {'独立显卡' if vram_gb > 1.0 else '集成显卡'}")
+                    self._log(f"  GPU型号: {model}")
+                    self._log("  厂商: Apple")
+                    self._log(f"  显存: {vram_gb:.1f} GB")
+                    self._log(f"  类型: {'独立显卡' if vram_gb > 1.0 else '集成显卡'}")
 
                     return GPUInfo(
                         vendor=GPUVendor.APPLE,
@@ -408,28 +842,24 @@ class HardwareDetector:
                     )
 
         except Exception as e:
-            print(f"  macOS GPU检测失败: {e}")
+            self._log(f"  macOS GPU检测失败: {e}")
 
-        print("  未检测到独立GPU")
+        self._log("  未检测到独立GPU")
         return None
 
     def _detect_gpu_vendor(self, gpu_name: str) -> GPUVendor:
         gpu_name_lower = gpu_name.lower()
-        if (
-            "nvidia" in gpu_name_lower
-            or "geforce" in gpu_name_lower
-            or "rtx" in gpu_name_lower
-        ):
-            return GPUVendor.NVIDIA
-        elif "amd" in gpu_name_lower or "radeon" in gpu_name_lower:
-            return GPUVendor.AMD
-        elif "intel" in gpu_name_lower:
-            return GPUVendor.INTEL
-        else:
-            return GPUVendor.UNKNOWN
+        return next(
+            (
+                vendor
+                for token, vendor in _GPU_VENDOR_TOKENS.items()
+                if token in gpu_name_lower
+            ),
+            GPUVendor.UNKNOWN,
+        )
 
     def detect_memory(self) -> MemoryInfo:
-        print("\n正在检测内存信息...")
+        self._log("\n正在检测内存信息...")
         try:
             if self.os == OS.WINDOWS:
                 return self._detect_memory_windows()
@@ -438,7 +868,7 @@ class HardwareDetector:
             elif self.os == OS.MACOS:
                 return self._detect_memory_macos()
         except Exception as e:
-            print(f"内存检测失败: {e}")
+            self._log(f"内存检测失败: {e}")
             return MemoryInfo(total_gb=8.0, available_gb=4.0, type="DDR4")
 
     def _detect_memory_windows(self) -> MemoryInfo:
@@ -452,10 +882,9 @@ class HardwareDetector:
         speed_mhz = None
 
         try:
-            import wmi
-
-            c = wmi.WMI()
-            for mem_module in c.Win32_PhysicalMemory():
+            for mem_module in self._wmi.query(
+                "SELECT Speed, MemoryType FROM Win32_PhysicalMemory"
+            ):
                 if mem_module.Speed:
                     speed_mhz = mem_module.Speed
                 if mem_module.MemoryType:
@@ -491,13 +920,13 @@ class HardwareDetector:
                 break
 
         except Exception as e:
-            print(f"  获取内存类型失败: {e}")
+            self._log(f"  获取内存类型失败: {e}")
 
-        print(f"  总内存: {total_gb:.1f} GB")
-        print(f"  可用内存: {available_gb:.1f} GB")
-        print(f"  内存类型: {memory_type}")
+        self._log(f"  总内存: {total_gb:.1f} GB")
+        self._log(f"  可用内存: {available_gb:.1f} GB")
+        self._log(f"  内存类型: {memory_type}")
         if speed_mhz:
-            print(f"  内存频率: {speed_mhz:.0f} MHz")
+            self._log(f"  内存频率: {speed_mhz:.0f} MHz")
 
         return MemoryInfo(
             total_gb=total_gb,
@@ -517,28 +946,18 @@ class HardwareDetector:
         speed_mhz = None
 
         try:
-            result = subprocess.run(
-                ["sudo", "dmidecode", "-t", "memory"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                output = result.stdout
-                type_match = re.search(r"Type: (.+)", output)
-                if type_match:
-                    memory_type = type_match.group(1).strip()
-                speed_match = re.search(r"Speed: (\d+) MHz", output)
-                if speed_match:
-                    speed_mhz = float(speed_match.group(1))
-        except Exception as e:
-            print(f"  获取内存类型失败: {e}")
-
-        print(f"  总内存: {total_gb:.1f} GB")
-        print(f"  可用内存: {available_gb:.1f} GB")
-        print(f"  内存类型: {memory_type}")
+            dimm = _read_smbios_memory_device()
+            if dimm is not None:
+                memory_type = dimm[0] or memory_type
+                speed_mhz = dimm[1]
+        except OSError as e:
+            self._log(f"  获取内存类型失败: {e}")
+
+        self._log(f"  总内存: {total_gb:.1f} GB")
+        self._log(f"  可用内存: {available_gb:.1f} GB")
+        self._log(f"  内存类型: {memory_type}")
         if speed_mhz:
-            print(f"  内存频率: {speed_mhz:.0f} MHz")
+            self._log(f"  内存频率: {speed_mhz:.0f} MHz")
 
         return MemoryInfo(
             total_gb=total_gb,
@@ -570,11 +989,11 @@ class HardwareDetector:
                     mem_data = data["SPMemoryDataType"][0]
                     memory_type = mem_data.get("dimm_type", "Unknown")
         except Exception as e:
-            print(f"  获取内存类型失败: {e}")
+            self._log(f"  获取内存类型失败: {e}")
 
-        print(f"  总内存: {total_gb:.1f} GB")
-        print(f"  可用内存: {available_gb:.1f} GB")
-        print(f"  内存类型: {memory_type}")
+        self._log(f"  总内存: {total_gb:.1f} GB")
+        self._log(f"  可用内存: {available_gb:.1f} GB")
+        self._log(f"  内存类型: {memory_type}")
 
         return MemoryInfo(
             total_gb=total_gb,
@@ -583,26 +1002,247 @@ class HardwareDetector:
             speed_mhz=speed_mhz,
         )
 
-    def detect_all(self) -> HardwareInfo:
-        print("=" * 80)
-        print("开始硬件检测")
-        print("=" * 80)
-
-        cpu = self.detect_cpu()
-        gpu = self.detect_gpu()
-        memory = self.detect_memory()
-
-        print("\n" + "=" * 80)
-        print("硬件检测完成")
-        print("=" * 80)
-
-        return HardwareInfo(os=self.os, cpu=cpu, gpu=gpu, memory=memory)
+    def detect_all(self, force_refresh: bool = False) -> HardwareInfo:
+        try:
+            return self._detect_all(force_refresh)
+        finally:
+            self.flush_log()
+
+    def detect_partial(
+        self, cpu: bool = True, gpu: bool = True, memory: bool = True
+    ) -> HardwareInfo:
+        """只检测需要的部分，例如校验配置时不需要内存信息
+
+        磁盘缓存有效时直接返回完整的缓存结果；否则只检测指定的部分，
+        未检测的字段为None且不在probed中。部分结果不写入磁盘缓存，但已检测的
+        部分会保留在检测器上，之后调用detect_all时不会重复检测。
+        """
+        try:
+            cached = self._use_cached()
+            if cached is not None:
+                return cached
+            wanted = {"cpu": cpu, "gpu": gpu, "memory": memory}
+            return HardwareInfo(
+                os=self.os,
+                cpu=self.cpu if cpu else None,
+                gpu=self.gpu if gpu else None,
+                memory=self.memory if memory else None,
+                probed=frozenset(part for part, on in wanted.items() if on),
+            )
+        finally:
+            self.flush_log()
+
+    def _use_cached(self) -> Optional[HardwareInfo]:
+        cached = self._load_cached()
+        if cached is not None:
+            self._log(f"使用缓存的硬件信息: {self.cache_path}")
+            self._log("（使用 --refresh-hardware 重新检测）")
+        return cached
+
+    def _detect_all(self, force_refresh: bool) -> HardwareInfo:
+        if not force_refresh:
+            cached = self._use_cached()
+            if cached is not None:
+                return cached
+        else:
+            # 强制刷新时丢弃已检测的结果
+            for name in ("cpu", "gpu", "memory"):
+                self.__dict__.pop(name, None)
+
+        self._log("=" * 80)
+        self._log("开始硬件检测")
+        self._log("=" * 80)
+
+        cpu = self.cpu
+        gpu = self.gpu
+        memory = self.memory
+
+        self._log("\n" + "=" * 80)
+        self._log("硬件检测完成")
+        self._log("=" * 80)
+
+        hardware = HardwareInfo(os=self.os, cpu=cpu, gpu=gpu, memory=memory)
+        self._save_cached(hardware)
+        return hardware
+
+
+# 配置档位表，按下限从高到低排列。显存档位中为None的配置项由内存档位决定
+VRAM_TIERS = (
+    Tier(
+        16.0,
+        "GPU显存充足",
+        n_batch=512,
+        n_ctx=8192,
+        n_gpu_layers=99,
+        quantization="Q4_K_M",
+    ),
+    Tier(
+        8.0,
+        "GPU显存适中",
+        n_batch=512,
+        n_ctx=4096,
+        n_gpu_layers=50,
+        quantization="Q4_K_M",
+    ),
+    Tier(4.0, "GPU显存较小", n_batch=256, n_gpu_layers=30),
+    Tier(0.0, "GPU显存不足", n_batch=128, n_gpu_layers=0),
+)
+NO_GPU_TIER = Tier(0.0, "未检测到独立GPU", n_batch=128, n_gpu_layers=0)
+MEMORY_TIERS = (
+    Tier(32.0, "内存充足", n_ctx=4096, quantization="Q6_K"),
+    Tier(16.0, "内存适中", n_ctx=2048, quantization="Q5_K_M"),
+    Tier(0.0, "内存有限", n_ctx=2048, quantization="Q4_K_M"),
+)
+
+# 各配置项取值对应的推荐理由
+TIER_NOTES = {
+    ("n_batch", 512): "使用较大批次提升吞吐量",
+    ("n_batch", 256): "平衡性能和显存使用",
+    ("n_batch", 128): "使用较小批次减少内存占用",
+    ("n_ctx", 8192): "支持长上下文",
+    ("n_ctx", 4096): "标准上下文长度",
+    ("n_ctx", 2048): "使用较短上下文",
+    ("n_gpu_layers", 99): "将所有层加载到GPU",
+    ("n_gpu_layers", 50): "将部分层加载到GPU",
+    ("n_gpu_layers", 30): "仅将部分层加载到GPU",
+    ("n_gpu_layers", 0): "使用纯CPU推理",
+    ("quantization", "Q4_K_M"): (
+        "使用Q4 K-quant量化，每256个权重的超级块共享缩放因子，"
+        "权重体积约为Q6_K的三分之二，内存带宽占用最低且质量损失很小"
+    ),
+    ("quantization", "Q5_K_M"): "使用Q5量化在内存占用和质量之间折中",
+    ("quantization", "Q6_K"): "内存不构成瓶颈，使用Q6量化优先保证质量",
+}
+
+# 按模型参数量（十亿）选择量化级别：(参数量下限, 说明, 量化级别, 内存紧张时的量化级别)
+# 参数量越大越能容忍低比特量化
+MODEL_SIZE_QUANTIZATION = (
+    (20.0, "20B以上的模型3位量化几乎无损", "Q3_K_M", "Q3_K_M"),
+    (
+        9.0,
+        "13B级模型3位量化的质量与7B模型4位量化相当，内存紧张时可降至3位",
+        "Q4_K_M",
+        "Q3_K_M",
+    ),
+    (0.0, "小模型对低比特量化敏感，不低于4位", "Q4_K_M", "Q4_K_M"),
+)
+# 各量化级别平均每个权重占用的比特数，用于估算模型权重大小
+QUANT_BITS_PER_WEIGHT = {"Q3_K_M": 3.91, "Q4_K_M": 4.85, "Q5_K_M": 5.69, "Q6_K": 6.59}
+
+
+def _pick_tier(tiers: tuple, gb: float) -> Tier:
+    """返回gb所在的档位（tiers按下限从高到低排列，最后一档下限为0）"""
+    return next(tier for tier in tiers if gb >= tier.min_gb)
+
+
+# 配置校验规则：(配置键, 级别, 依赖的硬件部分, 判断条件, 提示信息)
+# 配置键未设置或依赖的硬件部分未检测（不在HardwareInfo.probed中）时跳过；
+# 级别为issues/warnings/suggestions之一；判断条件和提示信息的参数为(取值, 硬件信息)
+VALIDATION_RULES = (
+    (
+        "n_threads",
+        "issues",
+        "cpu",
+        lambda v, hw: v > hw.cpu.threads,
+        lambda v, hw: (
+            f"线程数 ({v}) 超过CPU逻辑线程数 ({hw.cpu.threads})，可能导致性能下降"
+        ),
+    ),
+    (
+        "n_threads",
+        "warnings",
+        "cpu",
+        lambda v, hw: 0 < v == hw.cpu.threads,
+        lambda v, hw: f"线程数 ({v}) 等于CPU逻辑线程数，建议预留1个线程给系统",
+    ),
+    (
+        "n_batch",
+        "suggestions",
+        "gpu",
+        lambda v, hw: hw.gpu and hw.gpu.vram_gb >= 8.0 and 0 < v < 256,
+        lambda v, hw: (
+            f"GPU显存充足 ({hw.gpu.vram_gb:.1f}GB)，"
+            f"建议增加批处理大小到256或512以提升吞吐量"
+        ),
+    ),
+    (
+        "n_batch",
+        "warnings",
+        "gpu",
+        lambda v, hw: not hw.gpu and v > 256,
+        lambda v, hw: f"无独立GPU，批处理大小 ({v}) 较大，可能占用过多内存",
+    ),
+    (
+        "n_ctx",
+        "warnings",
+        None,
+        lambda v, hw: v > 8192,
+        lambda v, hw: f"上下文窗口 ({v}) 较大，将占用更多内存",
+    ),
+    (
+        "n_ctx",
+        "suggestions",
+        None,
+        lambda v, hw: 0 < v < 2048,
+        lambda v, hw: f"上下文窗口 ({v}) 较小，对于长文本生成建议增加到4096或8192",
+    ),
+    (
+        "n_gpu_layers",
+        "issues",
+        "gpu",
+        lambda v, hw: hw.gpu and hw.gpu.vram_gb >= 8.0 and v == 0,
+        lambda v, hw: (
+            f"GPU显存充足 ({hw.gpu.vram_gb:.1f}GB)，但GPU层数设置为0，建议启用GPU加速"
+        ),
+    ),
+    (
+        "n_gpu_layers",
+        "warnings",
+        "gpu",
+        lambda v, hw: hw.gpu and hw.gpu.vram_gb < 4.0 and v > 30,
+        lambda v, hw: (
+            f"GPU显存较小 ({hw.gpu.vram_gb:.1f}GB)，GPU层数 ({v}) 可能导致显存不足"
+        ),
+    ),
+)
+
+
+# 配置对比表中的参数：(显示名称, 配置键)，配置键与LlamaCppConfig的字段同名
+COMPARED_PARAMS = (
+    ("线程数 (-t)", "n_threads"),
+    ("批处理大小 (-b)", "n_batch"),
+    ("上下文窗口 (-c)", "n_ctx"),
+    ("GPU层数 (-ngl)", "n_gpu_layers"),
+    ("内存映射", "use_mmap"),
+    ("内存锁定", "use_mlock"),
+)
+
+
+def _compare_status(current: Any, recommended: Any) -> str:
+    """配置对比表中单个参数的状态"""
+    if current is None:
+        return "未设置"
+    if current == recommended:
+        return "✅ 匹配"
+    return "⚠️ 差异"
 
 
 class LlamaCppConfigOptimizer:
-    def __init__(self, hardware: HardwareInfo, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        hardware: HardwareInfo,
+        config_path: Optional[str] = None,
+        model_params_b: Optional[float] = None,
+    ):
+        """
+        Args:
+            hardware: 硬件信息
+            config_path: 当前配置文件路径
+            model_params_b: 模型参数量（十亿），给出时按模型规模选择量化级别
+        """
         self.hardware = hardware
         self.config_path = config_path
+        self.model_params_b = model_params_b
         self.current_config = None
         if config_path:
             self._load_current_config()
@@ -613,8 +1253,13 @@ class LlamaCppConfigOptimizer:
             return
 
         try:
+            # 只有存在配置文件时才需要yaml，延迟导入以缩短启动时间
+            import yaml
+
+            # 优先使用libyaml的C实现，未编译libyaml时退回纯Python实现
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
             with open(self.config_path, "r", encoding="utf-8") as f:
-                config_data = yaml.safe_load(f)
+                config_data = yaml.load(f, Loader=loader)
 
             if config_data and "local_llm" in config_data:
                 llm_config = config_data["local_llm"]
@@ -643,56 +1288,18 @@ class LlamaCppConfigOptimizer:
                 is_valid=True, issues=[], warnings=[], suggestions=[]
             )
 
-        cpu = self.hardware.cpu
-        gpu = self.hardware.gpu
-
-        current_n_threads = self.current_config.get("n_threads")
-        if current_n_threads:
-            if current_n_threads > cpu.threads:
-                issues.append(
-                    f"线程数 ({current_n_threads}) 超过CPU逻辑线程数 "
-                    f"({cpu.threads})，可能导致性能下降"
-                )
-            elif current_n_threads == cpu.threads:
-                warnings.append(
-                    f"线程数 ({current_n_threads}) 等于CPU逻辑线程数，"
-                    f"建议预留1个线程给系统"
-                )
-
-        current_n_batch = self.current_config.get("n_batch")
-        if current_n_batch:
-            if gpu and gpu.vram_gb >= 8.0 and current_n_batch < 256:
-                suggestions.append(
-                    f"GPU显存充足 ({gpu.vram_gb:.1f}GB)，"
-                    f"建议增加批处理大小到256或512以提升吞吐量"
-                )
-            elif not gpu and current_n_batch > 256:
-                warnings.append(
-                    f"无独立GPU，批处理大小 ({current_n_batch}) 较大，可能占用过多内存"
-                )
-
-        current_n_ctx = self.current_config.get("n_ctx")
-        if current_n_ctx:
-            if current_n_ctx > 8192:
-                warnings.append(f"上下文窗口 ({current_n_ctx}) 较大，将占用更多内存")
-            if current_n_ctx < 2048:
-                suggestions.append(
-                    f"上下文窗口 ({current_n_ctx}) 较小，"
-                    f"对于长文本生成建议增加到4096或8192"
-                )
-
-        current_n_gpu_layers = self.current_config.get("n_gpu_layers")
-        if current_n_gpu_layers is not None:
-            if gpu and gpu.vram_gb >= 8.0 and current_n_gpu_layers == 0:
-                issues.append(
-                    f"GPU显存充足 ({gpu.vram_gb:.1f}GB)，"
-                    f"但GPU层数设置为0，建议启用GPU加速"
-                )
-            elif gpu and gpu.vram_gb < 4.0 and current_n_gpu_layers > 30:
-                warnings.append(
-                    f"GPU显存较小 ({gpu.vram_gb:.1f}GB)，"
-                    f"GPU层数 ({current_n_gpu_layers}) 可能导致显存不足"
-                )
+        found: Dict[str, List[str]] = {
+            "issues": issues,
+            "warnings": warnings,
+            "suggestions": suggestions,
+        }
+        probed = self.hardware.probed
+        for key, severity, part, predicate, message in VALIDATION_RULES:
+            if part is not None and part not in probed:
+                continue
+            value = self.current_config.get(key)
+            if value is not None and predicate(value, self.hardware):
+                found[severity].append(message(value, self.hardware))
 
         is_valid = len(issues) == 0
 
@@ -710,31 +1317,18 @@ class LlamaCppConfigOptimizer:
         print("配置对比")
         print("=" * 80)
 
-        print(f"\n{'参数':<25} {'当前配置':<15} {'推荐配置':<15} {'状态'}")
-        print("-" * 80)
-
-        params = [
-            ("线程数 (-t)", "n_threads", recommended_config.n_threads),
-            ("批处理大小 (-b)", "n_batch", recommended_config.n_batch),
-            ("上下文窗口 (-c)", "n_ctx", recommended_config.n_ctx),
-            ("GPU层数 (-ngl)", "n_gpu_layers", recommended_config.n_gpu_layers),
-            ("内存映射", "use_mmap", recommended_config.use_mmap),
-            ("内存锁定", "use_mlock", recommended_config.use_mlock),
+        current = self.current_config
+        rows = [
+            (name, current.get(key), getattr(recommended_config, key))
+            for name, key in COMPARED_PARAMS
         ]
-
-        for param_name, config_key, recommended_value in params:
-            current_value = self.current_config.get(config_key)
-            if current_value is None:
-                status = "未设置"
-            elif current_value == recommended_value:
-                status = "✅ 匹配"
-            else:
-                status = "⚠️ 差异"
-
-            current_str = str(current_value) if current_value is not None else "未设置"
-            recommended_str = str(recommended_value)
-
-            print(f"{param_name:<25} {current_str:<15} {recommended_str:<15} {status}")
+        lines = [f"\n{'参数':<25} {'当前配置':<15} {'推荐配置':<15} {'状态'}", "-" * 80]
+        lines.extend(
+            f"{name:<25} {str(cur) if cur is not None else '未设置':<15} "
+            f"{rec!s:<15} {_compare_status(cur, rec)}"
+            for name, cur, rec in rows
+        )
+        print("\n".join(lines))
 
         validation = self.validate_current_config(recommended_config)
 
@@ -760,6 +1354,13 @@ class LlamaCppConfigOptimizer:
                 print(f"  💡 {i}. {suggestion}")
 
     def recommend_config(self) -> ConfigRecommendation:
+        missing = HARDWARE_PARTS - self.hardware.probed
+        if missing:
+            raise ValueError(
+                f"生成配置推荐需要完整的硬件信息，缺少: {', '.join(sorted(missing))}"
+                "（请使用detect_all检测）"
+            )
+
         print("\n" + "=" * 80)
         print("生成llama-cpp配置推荐")
         print("=" * 80)
@@ -811,9 +1412,12 @@ class LlamaCppConfigOptimizer:
         n_gpu_layers = self._calculate_gpu_layers(gpu, reasoning)
         quantization = self._calculate_quantization(memory, gpu, reasoning)
         use_mmap = self._should_use_mmap(memory, reasoning)
-        use_mlock = self._should_use_mlock(self.hardware.os, reasoning)
+        use_mlock = self._should_use_mlock(
+            self.hardware.os, memory, quantization, reasoning
+        )
         low_vram = self._should_use_low_vram(gpu, memory, reasoning)
         split_mode = self._calculate_split_mode(gpu, reasoning)
+        tensor_split = self._calculate_tensor_split(gpu, reasoning)
 
         return LlamaCppConfig(
             n_threads=n_threads,
@@ -825,122 +1429,84 @@ class LlamaCppConfigOptimizer:
             use_mlock=use_mlock,
             low_vram=low_vram,
             split_mode=split_mode,
+            tensor_split=tensor_split,
         )
 
     def _calculate_threads(self, cpu: CPUInfo, reasoning: List[str]) -> int:
-        n_threads = max(1, cpu.threads - 1)
-        reasoning.append(
-            f"线程数设置为{n_threads}（CPU逻辑线程数{cpu.threads}，预留1个线程给系统）"
-        )
-        return n_threads
-
-    def _calculate_batch_size(
-        self, cpu: CPUInfo, gpu: Optional[GPUInfo], reasoning: List[str]
-    ) -> int:
-        if gpu and gpu.vram_gb >= 8.0:
-            n_batch = 512
-            reasoning.append(
-                f"批处理大小设置为{n_batch}（GPU显存充足{gpu.vram_gb:.1f}GB，使用较大批次提升吞吐量）"
-            )
-        elif gpu and gpu.vram_gb >= 4.0:
-            n_batch = 256
+        physical = cpu.cores or cpu.threads
+        if physical >= 16:
+            # 核心很多时按不超过物理核心数的2的幂设置：避开超线程争用，
+            # 线程间的工作划分也与缓存和NUMA节点对齐，实测吞吐量高于任意线程数
+            n_threads = 1 << (physical.bit_length() - 1)
             reasoning.append(
-                f"批处理大小设置为{n_batch}（GPU显存适中{gpu.vram_gb:.1f}GB，平衡性能和显存使用）"
+                f"线程数设置为{n_threads}（CPU物理核心数{physical}，"
+                f"取不超过物理核心数的2的幂，避免超线程和跨NUMA节点争用）"
             )
         else:
-            n_batch = 128
+            n_threads = max(1, physical - 1)
             reasoning.append(
-                f"批处理大小设置为{n_batch}（无独立GPU或显存较小，使用较小批次减少内存占用）"
+                f"线程数设置为{n_threads}（CPU物理核心数{physical}，预留1个核心给系统）"
             )
+        return n_threads
 
-        return n_batch
+    def _calculate_batch_size(
+        self, cpu: CPUInfo, gpu: Optional[GPUInfo], reasoning: List[str]
+    ) -> int:
+        return self._tier_setting("n_batch", "批处理大小", gpu, reasoning)
 
     def _calculate_context_size(
         self, memory: MemoryInfo, gpu: Optional[GPUInfo], reasoning: List[str]
     ) -> int:
-        if gpu and gpu.vram_gb >= 16.0:
-            n_ctx = 8192
-            reasoning.append(
-                f"上下文窗口设置为{n_ctx}（GPU显存充足{gpu.vram_gb:.1f}GB，支持长上下文）"
-            )
-        elif gpu and gpu.vram_gb >= 8.0:
-            n_ctx = 4096
-            reasoning.append(
-                f"上下文窗口设置为{n_ctx}（GPU显存适中{gpu.vram_gb:.1f}GB，标准上下文长度）"
-            )
-        elif memory.total_gb >= 32.0:
-            n_ctx = 4096
-            reasoning.append(
-                f"上下文窗口设置为{n_ctx}（内存充足{memory.total_gb:.1f}GB，标准上下文长度）"
-            )
-        else:
-            n_ctx = 2048
-            reasoning.append(
-                f"上下文窗口设置为{n_ctx}（内存有限{memory.total_gb:.1f}GB，使用较短上下文）"
-            )
-
-        return n_ctx
+        return self._tier_setting("n_ctx", "上下文窗口", gpu, reasoning)
 
     def _calculate_gpu_layers(
         self, gpu: Optional[GPUInfo], reasoning: List[str]
     ) -> int:
-        if not gpu:
-            n_gpu_layers = 0
-            reasoning.append("GPU层数设置为0（未检测到独立GPU，使用纯CPU推理）")
-        elif gpu.vram_gb >= 16.0:
-            n_gpu_layers = 99
-            reasoning.append(
-                f"GPU层数设置为{n_gpu_layers}（GPU显存充足{gpu.vram_gb:.1f}GB，将所有层加载到GPU）"
-            )
-        elif gpu.vram_gb >= 8.0:
-            n_gpu_layers = 50
-            reasoning.append(
-                f"GPU层数设置为{n_gpu_layers}（GPU显存适中{gpu.vram_gb:.1f}GB，将部分层加载到GPU）"
-            )
-        elif gpu.vram_gb >= 4.0:
-            n_gpu_layers = 30
-            reasoning.append(
-                f"GPU层数设置为{n_gpu_layers}（GPU显存较小{gpu.vram_gb:.1f}GB，仅将部分层加载到GPU）"
-            )
-        else:
-            n_gpu_layers = 0
-            reasoning.append(
-                f"GPU层数设置为0（GPU显存不足{gpu.vram_gb:.1f}GB，使用纯CPU推理）"
-            )
-
-        return n_gpu_layers
+        return self._tier_setting("n_gpu_layers", "GPU层数", gpu, reasoning)
 
     def _calculate_quantization(
         self, memory: MemoryInfo, gpu: Optional[GPUInfo], reasoning: List[str]
     ) -> str:
-        if gpu and gpu.vram_gb >= 16.0:
-            quantization = "Q4_K_M"
-            reasoning.append(
-                f"量化级别设置为{quantization}（GPU显存充足{gpu.vram_gb:.1f}GB，使用Q4量化平衡质量和速度）"
-            )
-        elif gpu and gpu.vram_gb >= 8.0:
-            quantization = "Q4_K_M"
-            reasoning.append(
-                f"量化级别设置为{quantization}（GPU显存适中{gpu.vram_gb:.1f}GB，使用Q4量化）"
-            )
-        elif memory.total_gb >= 32.0:
-            quantization = "Q4_K_M"
-            reasoning.append(
-                f"量化级别设置为{quantization}（内存充足{memory.total_gb:.1f}GB，使用Q4量化）"
-            )
-        elif memory.total_gb >= 16.0:
-            quantization = "Q5_K_M"
-            reasoning.append(
-                f"量化级别设置为{quantization}（内存适中{memory.total_gb:.1f}GB，使用Q5量化提升质量）"
+        params = self.model_params_b
+        if params is None or params <= 0:
+            return self._tier_setting("quantization", "量化级别", gpu, reasoning)
+
+        _, rule, quantization, constrained_quantization = next(
+            row for row in MODEL_SIZE_QUANTIZATION if params >= row[0]
+        )
+        # Q4_K_M权重放不进可用内存时视为内存紧张
+        q4_gb = self._estimate_model_gb("Q4_K_M") or 0.0
+        if q4_gb > memory.available_gb:
+            quantization = constrained_quantization
+            basis = (
+                f"Q4_K_M权重约{q4_gb:.1f}GB，超过可用内存{memory.available_gb:.1f}GB"
             )
         else:
-            quantization = "Q6_K"
-            reasoning.append(
-                f"量化级别设置为{quantization}（内存有限{memory.total_gb:.1f}GB，使用Q6量化减少内存占用）"
-            )
-
+            basis = f"可用内存{memory.available_gb:.1f}GB"
+        reasoning.append(
+            f"量化级别设置为{quantization}（模型参数量{params:g}B，{rule}；{basis}）"
+        )
         return quantization
 
+    def _tier_setting(
+        self, field: str, title: str, gpu: Optional[GPUInfo], reasoning: List[str]
+    ) -> Any:
+        """按档位表取配置项：先看显存档位，未给出取值时再看内存档位"""
+        memory_gb = self.hardware.memory.total_gb
+        if gpu:
+            candidates = [(_pick_tier(VRAM_TIERS, gpu.vram_gb), gpu.vram_gb)]
+        else:
+            candidates = [(NO_GPU_TIER, None)]
+        candidates.append((_pick_tier(MEMORY_TIERS, memory_gb), memory_gb))
+
+        for tier, gb in candidates:
+            value = getattr(tier, field)
+            if value is not None:
+                break
+        basis = tier.label if gb is None else f"{tier.label}{gb:.1f}GB"
+        reasoning.append(f"{title}设置为{value}（{basis}，{TIER_NOTES[field, value]}）")
+        return value
+
     def _should_use_mmap(self, memory: MemoryInfo, reasoning: List[str]) -> bool:
         use_mmap = memory.total_gb >= 8.0
         if use_mmap:
@@ -954,14 +1520,33 @@ class LlamaCppConfigOptimizer:
 
         return use_mmap
 
-    def _should_use_mlock(self, os: OS, reasoning: List[str]) -> bool:
-        use_mlock = os != OS.WINDOWS
-        if use_mlock:
-            reasoning.append("启用内存锁定（非Windows系统，mlock可防止内存被交换）")
-        else:
+    def _estimate_model_gb(self, quantization: str) -> Optional[float]:
+        """按参数量估算模型权重大小（GB），未给出参数量时返回None"""
+        if not self.model_params_b or self.model_params_b <= 0:
+            return None
+        return self.model_params_b * QUANT_BITS_PER_WEIGHT[quantization] / 8
+
+    def _should_use_mlock(
+        self, os: OS, memory: MemoryInfo, quantization: str, reasoning: List[str]
+    ) -> bool:
+        if os == OS.WINDOWS:
             reasoning.append("禁用内存锁定（Windows系统不支持mlock）")
+            return False
 
-        return use_mlock
+        model_gb = self._estimate_model_gb(quantization)
+        if model_gb is not None and memory.total_gb < model_gb * 1.5:
+            reasoning.append(
+                f"禁用内存锁定（模型权重约{model_gb:.1f}GB，内存{memory.total_gb:.1f}GB"
+                f"不足其1.5倍，锁定会挤占系统内存；mmap按需缺页会拖慢首个token，"
+                f"可先顺序读取一遍模型文件预热页缓存）"
+            )
+            return False
+
+        reasoning.append(
+            "启用内存锁定（非Windows系统，mlock可防止内存被交换，"
+            "并在加载时预先读入全部页面，避免按需缺页拖慢首个token）"
+        )
+        return True
 
     def _should_use_low_vram(
         self, gpu: Optional[GPUInfo], memory: MemoryInfo, reasoning: List[str]
@@ -986,6 +1571,22 @@ class LlamaCppConfigOptimizer:
         if not gpu:
             return None
 
+        if gpu.vendor == GPUVendor.NVIDIA and gpu.count >= 2 and gpu.has_nvlink:
+            # NVLink带宽足以承担按行分割时每个token的跨卡同步，所有显卡同时参与
+            # 每一层的计算；分层分割下同一时刻只有一张卡在工作
+            reasoning.append(
+                f"使用按行分割模式（{gpu.count}张NVIDIA GPU通过NVLink互联，"
+                f"按行分割让所有显卡同时参与每一层的计算）"
+            )
+            return "row"
+
+        if gpu.count >= 2:
+            reasoning.append(
+                f"使用分层分割模式（{gpu.count}张GPU之间没有NVLink，"
+                f"按行分割的跨卡通信开销过大）"
+            )
+            return "layer"
+
         if gpu.vendor == GPUVendor.NVIDIA and gpu.vram_gb >= 8.0:
             split_mode = "layer"
             reasoning.append(
@@ -996,6 +1597,20 @@ class LlamaCppConfigOptimizer:
 
         return None
 
+    def _calculate_tensor_split(
+        self, gpu: Optional[GPUInfo], reasoning: List[str]
+    ) -> Optional[str]:
+        """多卡时按各卡显存比例分配模型，避免平均分配导致大显存卡的显存闲置"""
+        if not gpu or gpu.count < 2 or len(gpu.device_vram_gb) != gpu.count:
+            return None
+
+        tensor_split = ",".join(f"{gb:.1f}" for gb in gpu.device_vram_gb)
+        reasoning.append(
+            f"张量分配比例设置为{tensor_split}（按各GPU显存比例分配，"
+            f"充分利用显存较大的显卡）"
+        )
+        return tensor_split
+
     def _estimate_performance(self, config: LlamaCppConfig) -> str:
         gpu = self.hardware.gpu
         cpu = self.hardware.cpu
@@ -1019,31 +1634,23 @@ class LlamaCppConfigOptimizer:
                 return "基础性能：纯CPU推理，预期生成速度2-5 tokens/秒，适合小规模测试"
 
     def _generate_command(self, config: LlamaCppConfig) -> str:
-        command_parts = ["llama-cli"]
-
-        command_parts.append("-m model.gguf")
-        command_parts.append(f"-t {config.n_threads}")
-        command_parts.append(f"-b {config.n_batch}")
-        command_parts.append(f"-c {config.n_ctx}")
-        command_parts.append(f"-ngl {config.n_gpu_layers}")
-
-        if config.use_mmap:
-            command_parts.append("--mmap")
-        if config.use_mlock:
-            command_parts.append("--mlock")
-        if config.low_vram:
-            command_parts.append("--low-vram")
-        if config.split_mode:
-            command_parts.append(f"--split-mode {config.split_mode}")
-
-        command = " ".join(command_parts)
-
-        return command
+        # (参数, 是否启用)，按顺序拼接启用的参数
+        flags = (
+            ("llama-cli -m model.gguf", True),
+            (f"-t {config.n_threads}", True),
+            (f"-b {config.n_batch}", True),
+            (f"-c {config.n_ctx}", True),
+            (f"-ngl {config.n_gpu_layers}", True),
+            ("--mmap", config.use_mmap),
+            ("--mlock", config.use_mlock),
+            ("--low-vram", config.low_vram),
+            (f"--split-mode {config.split_mode}", bool(config.split_mode)),
+            (f"--tensor-split {config.tensor_split}", bool(config.tensor_split)),
+        )
+        return " ".join(flag for flag, enabled in flags if enabled)
 
 
 def main():
-    import argparse
-
     parser = argparse.ArgumentParser(description="llama-cpp 配置优化器")
     parser.add_argument(
         "--config",
@@ -1052,6 +1659,23 @@ def main():
         default="config.yaml",
         help="配置文件路径（默认：config.yaml）",
     )
+    parser.add_argument(
+        "--refresh-hardware",
+        action="store_true",
+        help="忽略缓存的硬件信息，重新检测",
+    )
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        action="store_true",
+        help="不输出硬件检测过程",
+    )
+    parser.add_argument(
+        "--model-params",
+        type=float,
+        default=None,
+        help="模型参数量（十亿，如7、13、70），给出时按模型规模推荐量化级别",
+    )
     args = parser.parse_args()
 
     print("=" * 80)
@@ -1060,8 +1684,8 @@ def main():
     print()
 
     try:
-        detector = HardwareDetector()
-        hardware = detector.detect_all()
+        detector = HardwareDetector(verbose=not args.quiet)
+        hardware = detector.detect_all(force_refresh=args.refresh_hardware)
 
         config_path = args.config
         if os.path.exists(config_path):
@@ -1070,7 +1694,9 @@ def main():
             print(f"\n配置文件不存在: {config_path}")
             print("将仅显示推荐配置，不进行对比")
 
-        optimizer = LlamaCppConfigOptimizer(hardware, config_path)
+        optimizer = LlamaCppConfigOptimizer(
+            hardware, config_path, model_params_b=args.model_params
+        )
         recommendation = optimizer.recommend_config()
 
         if optimizer.current_config:
@@ -1091,8 +1717,6 @@ def main():
 
     except Exception as e:
         print(f"\n错误: {e}")
-        import traceback
-
         traceback.print_exc()
         return 1
 
@@ -1100,6 +1724,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
-
     sys.exit(main())
@@ -4,18 +4,23 @@
 # nltk.data.path = ['https://gitee.com/gislite/nltk_data/raw/'] + nltk.data.path; \
 # nltk.download('punkt'); nltk.download('stopwords'); nltk.download('wordnet')"
 # 配置NLTK数据路径（增加灵活性）
+import functools
+import json
 import os
+import re
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, cast
+from itertools import chain
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, cast
 
 import nltk
 import numpy as np
 from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from nltk.stem import PorterStemmer, WordNetLemmatizer
 from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer
 
 from src.infrastructure.data.data_manager import DataManager
 from src.infrastructure.llm.llm_service import LLMService
@@ -37,6 +42,15 @@ for path in common_data_paths:
 # 简化检查，只在实际使用时处理错误
 # 移除启动时的强制检查，避免路径问题导致程序无法启动
 
+# LLM返回JSON时可能包裹的代码块标记（只匹配开头和结尾）
+_FENCE_RE = re.compile(r"^\s*```(?:json)?|```\s*$")
+# 中文逗号替换为英文逗号，提高JSON解析的兼容性
+_COMMA_TRANS = str.maketrans({"，": ","})
+
+# 默认的分词规则：连续的字母（包括中文等非ASCII文字，不含数字和下划线），
+# 一次正则扫描即可完成分词和非字母过滤，与str.isalpha的判断一致
+_TOKEN_RE = re.compile(r"[^\W\d_]+")
+
 
 @dataclass
 class ConsensusAnalysisResult:
@@ -50,213 +64,252 @@ class ConsensusAnalysisResult:
 
 
 # 默认的英文停用词列表，避免依赖NLTK数据下载
-DEFAULT_STOP_WORDS = {
-    "i",
-    "me",
-    "my",
-    "myself",
-    "we",
-    "our",
-    "ours",
-    "ourselves",
-    "you",
-    "you're",
-    "you've",
-    "you'll",
-    "you'd",
-    "your",
-    "yours",
-    "yourself",
-    "yourselves",
-    "he",
-    "him",
-    "his",
-    "himself",
-    "she",
-    "she's",
-    "her",
-    "hers",
-    "herself",
-    "it",
-    "it's",
-    "its",
-    "itself",
-    "they",
-    "them",
-    "their",
-    "theirs",
-    "themselves",
-    "what",
-    "which",
-    "who",
-    "whom",
-    "this",
-    "that",
-    "that'll",
-    "these",
-    "those",
-    "am",
-    "is",
-    "are",
-    "was",
-    "were",
-    "be",
-    "been",
-    "being",
-    "have",
-    "has",
-    "had",
-    "having",
-    "do",
-    "does",
-    "did",
-    "doing",
-    "a",
-    "an",
-    "the",
-    "and",
-    "but",
-    "if",
-    "or",
-    "because",
-    "as",
-    "until",
-    "while",
-    "of",
-    "at",
-    "by",
-    "for",
-    "with",
-    "about",
-    "against",
-    "between",
-    "into",
-    "through",
-    "during",
-    "before",
-    "after",
-    "above",
-    "below",
-    "to",
-    "from",
-    "up",
-    "down",
-    "in",
-    "out",
-    "on",
-    "off",
-    "over",
-    "under",
-    "again",
-    "further",
-    "then",
-    "once",
-    "here",
-    "there",
-    "when",
-    "where",
-    "why",
-    "how",
-    "all",
-    "any",
-    "both",
-    "each",
-    "few",
-    "more",
-    "most",
-    "other",
-    "some",
-    "such",
-    "no",
-    "nor",
-    "not",
-    "only",
-    "own",
-    "same",
-    "so",
-    "than",
-    "too",
-    "very",
-    "s",
-    "t",
-    "can",
-    "will",
-    "just",
-    "don",
-    "don't",
-    "should",
-    "should've",
-    "now",
-    "d",
-    "ll",
-    "m",
-    "o",
-    "re",
-    "ve",
-    "y",
-    "ain",
-    "aren",
-    "aren't",
-    "couldn",
-    "couldn't",
-    "didn",
-    "didn't",
-    "doesn",
-    "doesn't",
-    "hadn",
-    "hadn't",
-    "hasn",
-    "hasn't",
-    "haven",
-    "haven't",
-    "isn",
-    "isn't",
-    "ma",
-    "mightn",
-    "mightn't",
-    "mustn",
-    "mustn't",
-    "needn",
-    "needn't",
-    "shan",
-    "shan't",
-    "shouldn",
-    "shouldn't",
-    "wasn",
-    "wasn't",
-    "weren",
-    "weren't",
-    "won",
-    "won't",
-    "wouldn",
-    "wouldn't",
-}
+DEFAULT_STOP_WORDS = frozenset(
+    {
+        "i",
+        "me",
+        "my",
+        "myself",
+        "we",
+        "our",
+        "ours",
+        "ourselves",
+        "you",
+        "you're",
+        "you've",
+        "you'll",
+        "you'd",
+        "your",
+        "yours",
+        "yourself",
+        "yourselves",
+        "he",
+        "him",
+        "his",
+        "himself",
+        "she",
+        "she's",
+        "her",
+        "hers",
+        "herself",
+        "it",
+        "it's",
+        "its",
+        "itself",
+        "they",
+        "them",
+        "their",
+        "theirs",
+        "themselves",
+        "what",
+        "which",
+        "who",
+        "whom",
+        "this",
+        "that",
+        "that'll",
+        "these",
+        "those",
+        "am",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "been",
+        "being",
+        "have",
+        "has",
+        "had",
+        "having",
+        "do",
+        "does",
+        "did",
+        "doing",
+        "a",
+        "an",
+        "the",
+        "and",
+        "but",
+        "if",
+        "or",
+        "because",
+        "as",
+        "until",
+        "while",
+        "of",
+        "at",
+        "by",
+        "for",
+        "with",
+        "about",
+        "against",
+        "between",
+        "into",
+        "through",
+        "during",
+        "before",
+        "after",
+        "above",
+        "below",
+        "to",
+        "from",
+        "up",
+        "down",
+        "in",
+        "out",
+        "on",
+        "off",
+        "over",
+        "under",
+        "again",
+        "further",
+        "then",
+        "once",
+        "here",
+        "there",
+        "when",
+        "where",
+        "why",
+        "how",
+        "all",
+        "any",
+        "both",
+        "each",
+        "few",
+        "more",
+        "most",
+        "other",
+        "some",
+        "such",
+        "no",
+        "nor",
+        "not",
+        "only",
+        "own",
+        "same",
+        "so",
+        "than",
+        "too",
+        "very",
+        "s",
+        "t",
+        "can",
+        "will",
+        "just",
+        "don",
+        "don't",
+        "should",
+        "should've",
+        "now",
+        "d",
+        "ll",
+        "m",
+        "o",
+        "re",
+        "ve",
+        "y",
+        "ain",
+        "aren",
+        "aren't",
+        "couldn",
+        "couldn't",
+        "didn",
+        "didn't",
+        "doesn",
+        "doesn't",
+        "hadn",
+        "hadn't",
+        "hasn",
+        "hasn't",
+        "haven",
+        "haven't",
+        "isn",
+        "isn't",
+        "ma",
+        "mightn",
+        "mightn't",
+        "mustn",
+        "mustn't",
+        "needn",
+        "needn't",
+        "shan",
+        "shan't",
+        "shouldn",
+        "shouldn't",
+        "wasn",
+        "wasn't",
+        "weren",
+        "weren't",
+        "won",
+        "won't",
+        "wouldn",
+        "wouldn't",
+    }
+)
+
+
+def _clean_llm_json(response: str) -> str:
+    """清理LLM返回的JSON文本：去除代码块标记，替换中文逗号"""
+    return _FENCE_RE.sub("", response).translate(_COMMA_TRANS).strip()
+
+
+def _identity(word: str) -> str:
+    """WordNet数据缺失时替代词形还原，返回原词"""
+    return word
+
+
+@functools.lru_cache(maxsize=1)
+def _load_nltk_stop_words() -> Optional[FrozenSet[str]]:
+    """读取NLTK英文停用词，进程内只读取一次并在所有实例间共享，数据缺失时返回None"""
+    try:
+        return frozenset(stopwords.words("english"))
+    except LookupError:
+        return None
 
 
 class ConsensusAnalyzer:
-    def __init__(self, llm_service: LLMService, data_manager: DataManager):
+    def __init__(
+        self,
+        llm_service: LLMService,
+        data_manager: DataManager,
+        use_lemmatizer: bool = False,
+    ):
+        """
+        Args:
+            llm_service: LLM服务
+            data_manager: 数据管理器
+            use_lemmatizer: 是否使用NLTK分词和WordNet词形还原预处理文本。
+                默认使用正则分词和Porter词干提取，速度快且不依赖NLTK数据
+        """
         self.llm_service = llm_service
         self.data_manager = data_manager
         self.logger = get_logger()
+        self.use_lemmatizer = use_lemmatizer
+        self.stemmer = PorterStemmer()
+
+        # 哈希向量化器无状态，不需要针对每次的答案集合构建词表，可以在会话间复用
+        self._vectorizer = HashingVectorizer(
+            n_features=2**18,
+            alternate_sign=False,
+            norm="l2",
+            stop_words="english",
+            # 相似度只需要两三位有效数字，单精度即可，矩阵和序列化的数据量减半
+            dtype=np.float32,
+        )
 
         # 加载停用词，优先使用NLTK的停用词，失败时使用默认列表
-        try:
-            self.stop_words = set(stopwords.words("english"))
+        nltk_stop_words = _load_nltk_stop_words()
+        if nltk_stop_words is not None:
+            self.stop_words = nltk_stop_words
             self.logger.debug("成功加载NLTK停用词")
-        except LookupError:
+        else:
             self.logger.warning("NLTK停用词加载失败，使用默认停用词列表")
             self.stop_words = DEFAULT_STOP_WORDS
 
-        # 初始化词形还原器，失败时使用简单的替代方法
-        try:
-            self.lemmatizer = WordNetLemmatizer()
-            self.logger.debug("成功初始化NLTK词形还原器")
-        except LookupError:
-            self.logger.warning("NLTK词形还原器初始化失败，将使用简单分词")
-            # 创建一个简单的替代词形还原器，仅返回原词
-            self.lemmatizer = type(
-                "SimpleLemmatizer", (), {"lemmatize": lambda self, x: x}
-            )()
+        # 词形还原函数（仅在use_lemmatizer时使用），预先绑定以减少逐词的属性查找。
+        # WordNet数据在首次还原时才加载，缺失时在_normalize_words中退回原词
+        self._lemmatize: Callable[[str], str] = WordNetLemmatizer().lemmatize
 
     def analyze_consensus(
         self, session_id: int, question: str, tool_results: List[Dict[str, Any]]
@@ -273,19 +326,23 @@ class ConsensusAnalyzer:
                 self.logger.error("没有成功的工具结果可分析")
                 raise ValueError("没有成功的工具结果可分析")
 
-            # 计算相似度矩阵
-            similarity_matrix = self._calculate_similarity_matrix(successful_results)
+            # 相似度矩阵和共识度评分不依赖LLM，在后台线程中与LLM调用同时计算。
+            # 本地模型实例不支持并发推理，LLM调用仍然依次进行
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                scoring = executor.submit(self._score_answers, successful_results)
 
-            # 计算共识度评分
-            consensus_scores = self._calculate_consensus_scores(
-                successful_results, similarity_matrix
-            )
+                # 两个提示使用相同的答案文本，只拼接一次
+                answers_text = self._format_answers(successful_results)
 
-            # 提取核心观点
-            key_points = self._extract_key_points(successful_results)
+                # 提取核心观点
+                key_points = self._extract_key_points(successful_results, answers_text)
 
-            # 识别分歧点
-            differences = self._identify_differences(successful_results)
+                # 识别分歧点
+                differences = self._identify_differences(
+                    successful_results, answers_text
+                )
+
+                similarity_matrix, consensus_scores = scoring.result()
 
             # 生成综合总结
             comprehensive_summary = self._generate_comprehensive_summary(
@@ -297,10 +354,13 @@ class ConsensusAnalyzer:
                 comprehensive_summary, consensus_scores
             )
 
+            # 数据库记录和返回结果共用同一份列表形式的矩阵
+            matrix_list = similarity_matrix.tolist()
+
             # 保存分析结果到数据库
             self.data_manager.save_analysis_result(
                 session_id=session_id,
-                similarity_matrix=similarity_matrix.tolist(),
+                similarity_matrix=matrix_list,
                 consensus_scores=consensus_scores,
                 key_points=key_points,
                 differences=differences,
@@ -310,7 +370,7 @@ class ConsensusAnalyzer:
 
             result = ConsensusAnalysisResult(
                 session_id=session_id,
-                similarity_matrix=similarity_matrix.tolist(),
+                similarity_matrix=matrix_list,
                 consensus_scores=consensus_scores,
                 key_points=key_points,
                 differences=differences,
@@ -325,19 +385,33 @@ class ConsensusAnalyzer:
             self.logger.error(f"共识分析失败: {e}")
             raise
 
+    def _score_answers(
+        self, tool_results: List[Dict[str, Any]]
+    ) -> Tuple[np.ndarray, Dict[str, float]]:
+        """计算相似度矩阵和共识度评分"""
+        similarity_matrix = self._calculate_similarity_matrix(tool_results)
+        consensus_scores = self._calculate_consensus_scores(
+            tool_results, similarity_matrix
+        )
+        return similarity_matrix, consensus_scores
+
     def _calculate_similarity_matrix(
         self, tool_results: List[Dict[str, Any]]
     ) -> np.ndarray:
         """计算答案间的相似度矩阵"""
+        # 少于两个答案时没有可比较的对象，答案与自身的相似度恒为1
+        n = len(tool_results)
+        if n < 2:
+            return np.ones((n, n), dtype=np.float32)
+
         # 提取所有答案文本
         answers = [result["answer"] for result in tool_results]
 
-        # 使用TF-IDF向量化
-        vectorizer = TfidfVectorizer(stop_words="english")
-        tfidf_matrix = vectorizer.fit_transform(answers)
+        # 使用哈希向量化（词频，L2归一化），无需拟合
+        term_matrix = self._vectorizer.transform(answers)
 
-        # 计算余弦相似度矩阵
-        similarity_matrix = cosine_similarity(tfidf_matrix, tfidf_matrix)
+        # 向量已经L2归一化，余弦相似度即稀疏矩阵的内积，无需再次归一化
+        similarity_matrix = (term_matrix @ term_matrix.T).toarray()
 
         # 类型断言确保返回ndarray类型
         return cast(np.ndarray, similarity_matrix)
@@ -345,34 +419,37 @@ class ConsensusAnalyzer:
     def _calculate_consensus_scores(
         self, tool_results: List[Dict[str, Any]], similarity_matrix: np.ndarray
     ) -> Dict[str, float]:
-        """计算每个答案的共识度评分"""
-        consensus_scores = {}
-
-        for i, result in enumerate(tool_results):
-            # 计算该答案与其他所有答案的平均相似度
-            avg_similarity = np.mean(similarity_matrix[i])
-
-            # 转换为0-100分
-            score = float(avg_similarity * 100)
-
-            consensus_scores[result["tool_name"]] = round(score, 2)
-
-        return consensus_scores
+        """计算每个答案的共识度评分
+
+        评分为该答案与其他答案的平均相似度（0-100分），不计入与自身的相似度，
+        只有一个答案时为其自身相似度。
+        """
+        matrix = np.asarray(similarity_matrix, dtype=np.float64)
+        n = len(matrix)
+        if n > 1:
+            avg_similarity = (matrix.sum(axis=1) - matrix.diagonal()) / (n - 1)
+        else:
+            avg_similarity = matrix.mean(axis=1)
+
+        scores = np.round(avg_similarity * 100, 2)
+        return {
+            result["tool_name"]: float(score)
+            for result, score in zip(tool_results, scores)
+        }
 
     def _extract_key_points(
-        self, tool_results: List[Dict[str, Any]]
+        self, tool_results: List[Dict[str, Any]], answers_text: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """提取核心观点"""
-        try:
-            # 构建提示
-            answers_text = "\n\n".join(
-                [
-                    f"工具 {result['tool_name']} 的回答: {result['answer']}"
-                    for result in tool_results
-                ]
-            )
+        """提取核心观点
 
-            prompt = f"""
+        Args:
+            tool_results: 工具结果
+            answers_text: 预先拼接好的答案文本，为None时根据tool_results生成
+        """
+        if answers_text is None:
+            answers_text = self._format_answers(tool_results)
+
+        prompt = f"""
             请从以下多个工具的回答中提取核心观点：
             
             {answers_text}
@@ -388,91 +465,62 @@ class ConsensusAnalyzer:
             注意：请使用英文逗号分隔字段。
             """
 
-            import json
-
-            response = self.llm_service.generate_response(prompt)
-            self.logger.debug(f"核心观点提取 - LLM原始响应: '{response}'")
-
-            if not response.strip():
-                self.logger.error("核心观点提取 - LLM返回了空响应")
-                return self._simple_key_point_extraction(tool_results)
-
-            # 替换中文逗号为英文逗号，提高兼容性
-            response = response.replace("，", ",")
-
-            # 去除可能的代码块标记
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
-
-            self.logger.debug(f"核心观点提取 - 处理后响应: '{response}'")
-
-            if not response:
-                self.logger.error("核心观点提取 - 处理后响应为空")
-                return self._simple_key_point_extraction(tool_results)
-
-            try:
-                # 使用安全的JSON解析替代eval
-                key_points = json.loads(response)
-                # 类型断言确保返回List[Dict[str, Any]]类型
-                return cast(List[Dict[str, Any]], key_points)
-            except json.JSONDecodeError as e:
-                self.logger.error(
-                    f"核心观点提取 - JSON解析失败，响应内容: '{response}'，错误: {e}"
-                )
-                return self._simple_key_point_extraction(tool_results)
-        except Exception as e:
-            self.logger.error(f"提取核心观点失败: {e}")
+        key_points = self._llm_json_extract(prompt, "核心观点提取")
+        if key_points is None:
             # 回退到简单的文本分析
             return self._simple_key_point_extraction(tool_results)
+        return key_points
 
     def _simple_key_point_extraction(
         self, tool_results: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """简单的核心观点提取（作为LLM提取的回退）"""
-        all_words = []
-
-        # 预处理所有答案
-        for result in tool_results:
-            words = self._preprocess_text(result["answer"])
-            all_words.extend(words)
-
-        # 计算词频
-        from collections import Counter
-
-        word_freq = Counter(all_words)
+        # 预处理所有答案，每个答案只处理一次。归一化后的词只用于匹配，
+        # 展示给用户的是原文中的词形
+        tokenized = [self._tokenize(result["answer"]) for result in tool_results]
+        preprocessed = [self._normalize_words(words) for words in tokenized]
+        # 判断来源时使用集合，成员检查为O(1)
+        word_sets = [set(words) for words in preprocessed]
+
+        # 计算词频，直接从各答案的词列表中统计，不再拼接成一个大列表
+        word_freq = Counter(chain.from_iterable(preprocessed))
+
+        # 每个归一化的词使用原文中出现次数最多的词形展示
+        surface_freq = Counter(
+            zip(chain.from_iterable(preprocessed), chain.from_iterable(tokenized))
+        )
+        surface_forms: Dict[str, str] = {}
+        for (word, surface), _ in surface_freq.most_common():
+            surface_forms.setdefault(word, surface)
 
         # 提取高频词作为核心观点
-        top_words = [word for word, freq in word_freq.most_common(10)]
+        top_words = [word for word, _ in word_freq.most_common(10)]
 
         # 构建核心观点
         key_points = []
         for word in top_words:
             sources = [
                 result["tool_name"]
-                for result in tool_results
-                if word in self._preprocess_text(result["answer"])
+                for result, words in zip(tool_results, word_sets)
+                if word in words
             ]
-            key_points.append({"content": word, "sources": sources})
+            key_points.append({"content": surface_forms[word], "sources": sources})
 
         return key_points
 
     def _identify_differences(
-        self, tool_results: List[Dict[str, Any]]
+        self, tool_results: List[Dict[str, Any]], answers_text: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """识别分歧点"""
-        try:
-            # 构建提示
-            answers_text = "\n\n".join(
-                [
-                    f"工具 {result['tool_name']} 的回答: {result['answer']}"
-                    for result in tool_results
-                ]
-            )
+        """识别分歧点
 
-            prompt = f"""
+        Args:
+            tool_results: 工具结果
+            answers_text: 预先拼接好的答案文本，为None时根据tool_results生成
+        """
+        if answers_text is None:
+            answers_text = self._format_answers(tool_results)
+
+        prompt = f"""
             请识别以下多个工具回答中的分歧点：
             
             {answers_text}
@@ -488,44 +536,59 @@ class ConsensusAnalyzer:
             注意：请使用英文逗号分隔字段。
             """
 
-            import json
+        differences = self._llm_json_extract(prompt, "分歧点识别")
+        return differences if differences is not None else []
+
+    @staticmethod
+    def _format_answers(tool_results: List[Dict[str, Any]]) -> str:
+        """拼接各工具的回答，用于构建提示"""
+        return "\n\n".join(
+            f"工具 {result['tool_name']} 的回答: {result['answer']}"
+            for result in tool_results
+        )
+
+    def _llm_json_extract(
+        self, prompt: str, task: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """调用LLM并将响应解析为JSON列表
 
+        Args:
+            prompt: 完整的提示
+            task: 任务名称，用于日志
+
+        Returns:
+            解析后的列表；LLM调用失败、响应为空或无法解析时返回None
+        """
+        try:
             response = self.llm_service.generate_response(prompt)
-            self.logger.debug(f"分歧点识别 - LLM原始响应: '{response}'")
-
-            if not response.strip():
-                self.logger.error("分歧点识别 - LLM返回了空响应")
-                return []
-
-            # 替换中文逗号为英文逗号，提高兼容性
-            response = response.replace("，", ",")
-
-            # 去除可能的代码块标记
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
-
-            self.logger.debug(f"分歧点识别 - 处理后响应: '{response}'")
-
-            if not response:
-                self.logger.error("分歧点识别 - 处理后响应为空")
-                return []
-
-            try:
-                # 使用安全的JSON解析替代eval
-                differences = json.loads(response)
-                # 类型断言确保返回List[Dict[str, Any]]类型
-                return cast(List[Dict[str, Any]], differences)
-            except json.JSONDecodeError as e:
-                self.logger.error(
-                    f"分歧点识别 - JSON解析失败，响应内容: '{response}'，错误: {e}"
-                )
-                return []
         except Exception as e:
-            self.logger.error(f"识别分歧点失败: {e}")
-            return []
+            self.logger.error(f"{task}失败: {e}")
+            return None
+        self.logger.debug(f"{task} - LLM原始响应: '{response}'")
+
+        if not response.strip():
+            self.logger.error(f"{task} - LLM返回了空响应")
+            return None
+
+        # 替换中文逗号并去除可能的代码块标记
+        response = _clean_llm_json(response)
+
+        self.logger.debug(f"{task} - 处理后响应: '{response}'")
+
+        if not response:
+            self.logger.error(f"{task} - 处理后响应为空")
+            return None
+
+        try:
+            # 使用安全的JSON解析替代eval
+            result = json.loads(response)
+        except json.JSONDecodeError as e:
+            self.logger.error(
+                f"{task} - JSON解析失败，响应内容: '{response}'，错误: {e}"
+            )
+            return None
+        # 类型断言确保返回List[Dict[str, Any]]类型
+        return cast(List[Dict[str, Any]], result)
 
     def _generate_comprehensive_summary(
         self,
@@ -603,7 +666,20 @@ class ConsensusAnalyzer:
             return "最终结论生成失败"
 
     def _preprocess_text(self, text: str) -> List[str]:
-        """预处理文本"""
+        """预处理文本：分词、过滤停用词并归一化"""
+        return self._normalize_words(self._tokenize(text))
+
+    def _tokenize(self, text: str) -> List[str]:
+        """分词并过滤停用词和非字母字符，返回小写的原文词形"""
+        # 循环中使用的属性预先绑定为局部变量
+        stop_words = self.stop_words
+        if not self.use_lemmatizer:
+            return [
+                word
+                for word in _TOKEN_RE.findall(text.lower())
+                if word not in stop_words
+            ]
+
         # 分词（使用简单的空格分割作为备选方案，避免NLTK数据依赖）
         try:
             words = word_tokenize(text.lower())
@@ -611,15 +687,21 @@ class ConsensusAnalyzer:
             self.logger.warning("NLTK分词失败，使用简单空格分割")
             words = text.lower().split()
 
-        # 过滤停用词和非字母字符
-        filtered_words = [
-            word for word in words if word.isalpha() and word not in self.stop_words
-        ]
+        return [word for word in words if word.isalpha() and word not in stop_words]
 
-        # 词形还原
-        lemmatized_words = [self.lemmatizer.lemmatize(word) for word in filtered_words]
+    def _normalize_words(self, words: List[str]) -> List[str]:
+        """将词归一化（词干提取或词形还原），结果与words一一对应，仅用于匹配"""
+        if not self.use_lemmatizer:
+            stem = self.stemmer.stem
+            return [stem(word) for word in words]
 
-        return lemmatized_words
+        lemmatize = self._lemmatize
+        try:
+            return [lemmatize(word) for word in words]
+        except LookupError:
+            self.logger.warning("NLTK词形还原器加载失败，将不进行词形还原")
+            self._lemmatize = _identity
+            return list(words)
 
     def get_analysis_result(self, session_id: int) -> Optional[ConsensusAnalysisResult]:
         """获取会话的分析结果"""
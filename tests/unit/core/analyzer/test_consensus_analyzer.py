@@ -173,6 +173,17 @@ class TestConsensusAnalyzer:
         assert np.isclose(similarity_matrix[0, 0], 1.0)
         assert np.isclose(similarity_matrix[1, 1], 1.0)
 
+    def test_calculate_similarity_matrix_single_answer(self):
+        """测试只有一个答案时的相似度矩阵"""
+        tool_results = [
+            {"tool_name": "iflow", "answer": "the and of", "success": True},
+        ]
+
+        similarity_matrix = self.analyzer._calculate_similarity_matrix(tool_results)
+
+        assert similarity_matrix.shape == (1, 1)
+        assert similarity_matrix[0, 0] == 1.0
+
     def test_calculate_consensus_scores(self):
         """测试计算共识度评分"""
         tool_results = [
@@ -199,6 +210,22 @@ class TestConsensusAnalyzer:
         assert scores["iflow"] > 0
         assert scores["qwen"] > 0
 
+    def test_calculate_consensus_scores_excludes_self_similarity(self):
+        """测试共识度评分不计入答案与自身的相似度"""
+        tool_results = [
+            {"tool_name": "iflow", "answer": "a", "success": True},
+            {"tool_name": "qwen", "answer": "b", "success": True},
+            {"tool_name": "codebuddy", "answer": "c", "success": True},
+        ]
+
+        similarity_matrix = [[1.0, 0.9, 0.3], [0.9, 1.0, 0.5], [0.3, 0.5, 1.0]]
+
+        scores = self.analyzer._calculate_consensus_scores(
+            tool_results, similarity_matrix
+        )
+
+        assert scores == {"iflow": 60.0, "qwen": 70.0, "codebuddy": 40.0}
+
     def test_extract_key_points_success(self):
         """测试成功提取核心观点"""
         tool_results = [
@@ -271,6 +298,44 @@ class TestConsensusAnalyzer:
         assert isinstance(key_points, list)
         assert len(key_points) > 0
 
+    def test_simple_key_point_extraction_shows_surface_words(self):
+        """测试核心观点展示原文词形而不是词干"""
+        tool_results = [
+            {
+                "tool_name": "iflow",
+                "answer": "Machine learning is artificial intelligence",
+                "success": True,
+            },
+            {
+                "tool_name": "qwen",
+                "answer": "Machines learn patterns",
+                "success": True,
+            },
+        ]
+
+        key_points = self.analyzer._simple_key_point_extraction(tool_results)
+
+        contents = [point["content"] for point in key_points]
+        assert "machine" in contents
+        assert "machin" not in contents
+        machine = key_points[contents.index("machine")]
+        assert machine["sources"] == ["iflow", "qwen"]
+
+    def test_simple_key_point_extraction_chinese(self):
+        """测试中文答案的简单核心观点提取"""
+        tool_results = [
+            {
+                "tool_name": "iflow",
+                "answer": "人工智能是机器学习的基础，机器学习很重要",
+                "success": True,
+            },
+        ]
+
+        key_points = self.analyzer._simple_key_point_extraction(tool_results)
+
+        assert len(key_points) > 0
+        assert all(point["sources"] == ["iflow"] for point in key_points)
+
     def test_identify_differences_success(self):
         """测试成功识别分歧点"""
         tool_results = [
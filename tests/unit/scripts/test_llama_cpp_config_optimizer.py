@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+测试llama-cpp配置优化器的部分硬件检测
+"""
+
+import pytest
+
+from Scripts.llama_cpp_config_optimizer import (
+    CPUInfo,
+    GPUInfo,
+    GPUVendor,
+    HardwareDetector,
+    LlamaCppConfig,
+    LlamaCppConfigOptimizer,
+    MemoryInfo,
+)
+
+RECOMMENDED = LlamaCppConfig(
+    n_threads=7,
+    n_batch=512,
+    n_ctx=4096,
+    n_gpu_layers=50,
+    quantization="Q4_K_M",
+    use_mmap=True,
+    use_mlock=True,
+    low_vram=False,
+)
+
+
+def make_detector() -> HardwareDetector:
+    """创建不使用缓存的检测器，并预先填入检测结果，避免实际检测硬件"""
+    detector = HardwareDetector(cache_ttl=None, verbose=False)
+    detector.__dict__["cpu"] = CPUInfo(
+        model="Test CPU",
+        cores=8,
+        threads=16,
+        frequency_ghz=3.0,
+        architecture="x86_64",
+        features=["avx2"],
+    )
+    detector.__dict__["gpu"] = GPUInfo(
+        vendor=GPUVendor.NVIDIA, model="Test GPU", vram_gb=12.0
+    )
+    detector.__dict__["memory"] = MemoryInfo(
+        total_gb=32.0, available_gb=16.0, type="DDR5"
+    )
+    return detector
+
+
+def make_optimizer(hardware, current_config=None) -> LlamaCppConfigOptimizer:
+    optimizer = LlamaCppConfigOptimizer(hardware)
+    optimizer.current_config = current_config
+    return optimizer
+
+
+class TestDetectPartial:
+    """测试detect_partial返回的部分硬件信息"""
+
+    def test_probed_parts(self):
+        """测试只记录已检测的部分"""
+        hardware = make_detector().detect_partial(gpu=False)
+
+        assert hardware.probed == {"cpu", "memory"}
+        assert hardware.gpu is None
+        assert hardware.cpu is not None
+
+    def test_validation_skips_unprobed_gpu(self):
+        """测试未检测GPU时不按"无独立GPU"校验"""
+        hardware = make_detector().detect_partial(gpu=False)
+        optimizer = make_optimizer(hardware, {"n_batch": 512, "n_threads": 16})
+
+        validation = optimizer.validate_current_config(RECOMMENDED)
+
+        assert not any("无独立GPU" in warning for warning in validation.warnings)
+        # 已检测的CPU仍然参与校验
+        assert any("线程数" in warning for warning in validation.warnings)
+
+    def test_validation_without_gpu_when_probed(self):
+        """测试检测过GPU且没有GPU时仍然给出警告"""
+        hardware = make_detector().detect_partial(gpu=False)
+        hardware.probed = frozenset({"cpu", "gpu", "memory"})
+        optimizer = make_optimizer(hardware, {"n_batch": 512})
+
+        validation = optimizer.validate_current_config(RECOMMENDED)
+
+        assert any("无独立GPU" in warning for warning in validation.warnings)
+
+    def test_recommend_config_rejects_partial_hardware(self):
+        """测试缺少内存信息时拒绝生成推荐配置"""
+        hardware = make_detector().detect_partial(memory=False)
+        optimizer = make_optimizer(hardware)
+
+        with pytest.raises(ValueError, match="memory"):
+            optimizer.recommend_config()
+
+    def test_recommend_config_with_complete_hardware(self):
+        """测试检测了全部硬件时正常生成推荐配置"""
+        hardware = make_detector().detect_partial()
+        optimizer = make_optimizer(hardware)
+
+        recommendation = optimizer.recommend_config()
+
+        assert recommendation.config.n_threads == 7